@@ -4,6 +4,20 @@ __version__ = "1.0.0"
 __author__ = "AgentGino"
 __email__ = "himakar@qwik.tools"
 
-from .checker import get_aws_profiles, get_account_info
-
 __all__ = ["get_aws_profiles", "get_account_info"]
+
+# Public name -> module that defines it
+_LAZY_ATTRIBUTES = {
+    "get_aws_profiles": "profiles",
+    "get_account_info": "account_info",
+}
+
+
+def __getattr__(name):
+    # Resolve the public API lazily so importing the package (e.g. for the
+    # CLI's --help) doesn't pull in boto3
+    if name in _LAZY_ATTRIBUTES:
+        from importlib import import_module
+        module = import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,70 @@
+"""Shared construction of AWS service clients."""
+
+from botocore.config import Config
+
+# Fail fast on unreachable or hung endpoints instead of retrying for minutes;
+# a status check is cheap to re-run. In a client config 'max_attempts' counts
+# retries, so the single attempt is spelled 'total_max_attempts'
+STS_CLIENT_SETTINGS = {
+    'connect_timeout': 2,
+    'read_timeout': 3,
+    'retries': {'total_max_attempts': 1, 'mode': 'standard'},
+}
+
+
+def sts_config(config_class=Config):
+    """
+    Build a client config from STS_CLIENT_SETTINGS.
+    
+    botocore normalizes a config's retries dict in place when a client is
+    created, so each config gets its own copy rather than sharing the
+    module-level one.
+    
+    Args:
+        config_class: botocore Config or aiobotocore AioConfig
+    """
+    settings = dict(STS_CLIENT_SETTINGS, retries=dict(STS_CLIENT_SETTINGS['retries']))
+    return config_class(**settings)
+
+
+_STS_CONFIG = sts_config()
+
+# Refresh makes several STS/IAM calls on one client, so keep the connection
+# alive between them and let throttled IAM calls back off and retry
+REFRESH_CLIENT_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=10,
+    retries={'max_attempts': 3, 'mode': 'adaptive'},
+    connect_timeout=3,
+    read_timeout=10,
+)
+
+
+def use_regional_sts(session):
+    """
+    Make a session's STS clients use the regional endpoint.
+    
+    botocore still resolves the URL itself, so endpoint_url overrides,
+    FIPS and dualstack settings and non-aws partitions keep working.
+    """
+    session.set_config_variable('sts_regional_endpoints', 'regional')
+
+
+def sts_client(session):
+    """
+    Create an STS client bound to the session region's STS endpoint.
+    
+    The global sts.amazonaws.com endpoint lives in us-east-1, so every call
+    from elsewhere pays a cross-region round-trip; the regional endpoint
+    answers the same calls with much lower latency. Timeouts are short and
+    retries disabled so one unhealthy profile can't stall a listing.
+    
+    Args:
+        session: botocore Session to create the client from
+        
+    Returns:
+        STS client
+    """
+    use_regional_sts(session)
+    region = session.get_config_variable('region') or 'us-east-1'
+    return session.create_client('sts', region_name=region, config=_STS_CONFIG)
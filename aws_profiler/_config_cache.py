@@ -0,0 +1,53 @@
+"""Shared cache of parsed AWS configuration files."""
+
+import configparser
+import functools
+
+from ._paths import credentials_path, config_path
+
+
+@functools.lru_cache(maxsize=4)
+def _parse(path_str, mtime_ns, size):
+    """
+    Parse an INI file.
+    
+    The modification time and size are only part of the cache key: a
+    rewritten file produces a new key, and the stale parse is evicted.
+    """
+    config = configparser.ConfigParser()
+    config.read(path_str)
+    return config
+
+
+def _load(path):
+    """
+    Parse an INI file, reusing the previous parse while the file is unchanged.
+    
+    Args:
+        path: Path to the INI file
+        
+    Returns:
+        ConfigParser: Shared parsed config (must not be mutated), or None
+        if the file does not exist
+    """
+    try:
+        stat_result = path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    
+    return _parse(str(path), stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def get_credentials_config():
+    """Get the parsed ~/.aws/credentials file, or None if it doesn't exist."""
+    return _load(credentials_path())
+
+
+def get_aws_config():
+    """Get the parsed ~/.aws/config file, or None if it doesn't exist."""
+    return _load(config_path())
+
+
+def clear_cache():
+    """Forget all cached parses."""
+    _parse.cache_clear()
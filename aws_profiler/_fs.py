@@ -0,0 +1,73 @@
+"""Short-lived cached listing of the ~/.aws directory."""
+
+import os
+import time
+
+from . import _paths, _statx
+
+# Seconds a listing is reused, long enough for one render of the profile table
+SCAN_TTL = 0.05
+
+# (directory, time scanned, entry name -> os.DirEntry, entry name -> stat key), or None
+_SCAN = None
+
+
+def _scan_aws_dir():
+    """
+    List ~/.aws, reusing a listing made less than SCAN_TTL seconds ago.
+    
+    Returns:
+        tuple: (directory, time scanned, entry name -> os.DirEntry, stat keys
+        looked up so far); no entries if the directory doesn't exist
+    """
+    global _SCAN
+    directory = str(_paths.aws_dir())
+    now = time.monotonic()
+    
+    if _SCAN is not None and _SCAN[0] == directory and now - _SCAN[1] < SCAN_TTL:
+        return _SCAN
+    
+    try:
+        with os.scandir(directory) as it:
+            entries = {entry.name: entry for entry in it}
+    except (FileNotFoundError, NotADirectoryError):
+        entries = {}
+    
+    _SCAN = (directory, now, entries, {})
+    return _SCAN
+
+
+def aws_file_exists(name):
+    """Check whether ~/.aws has an entry with this name."""
+    return name in _scan_aws_dir()[2]
+
+
+def aws_file_key(name):
+    """
+    Get the inode, modification time and size of a file in ~/.aws.
+    
+    The answer is kept with the listing, so every lookup served by one
+    listing shares a single statx call.
+    
+    Returns:
+        tuple: (st_ino, st_mtime_ns, st_size), or None if the file doesn't exist
+    """
+    _, _, entries, keys = _scan_aws_dir()
+    if name in keys:
+        return keys[name]
+    
+    entry = entries.get(name)
+    try:
+        key = None if entry is None else _statx.stat_key(entry.path)
+    except FileNotFoundError:
+        # Dangling symlink, or removed since the listing
+        key = None
+    
+    keys[name] = key
+    return key
+
+
+def clear_cache():
+    """Forget the cached listing, e.g. after rewriting a file in ~/.aws."""
+    global _SCAN
+    _SCAN = None
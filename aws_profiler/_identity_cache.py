@@ -0,0 +1,40 @@
+"""Short-lived cache of STS caller identities."""
+
+import time
+
+# Seconds a cached identity stays valid
+IDENTITY_TTL = 300
+
+# profile name -> (time fetched, GetCallerIdentity response)
+_CACHE = {}
+
+
+def get_caller_identity_cached(sts_client, profile_name, ttl=IDENTITY_TTL):
+    """
+    Get the caller identity for a profile, reusing a recent answer.
+    
+    Args:
+        sts_client: STS client for the profile
+        profile_name: Name of the AWS profile, used as the cache key
+        ttl: Seconds a cached identity stays valid
+        
+    Returns:
+        dict: GetCallerIdentity response
+    """
+    cached = _CACHE.get(profile_name)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    
+    identity = sts_client.get_caller_identity()
+    _CACHE[profile_name] = (time.monotonic(), identity)
+    return identity
+
+
+def invalidate(profile_name):
+    """Forget the cached identity for a profile."""
+    _CACHE.pop(profile_name, None)
+
+
+def clear_cache():
+    """Forget all cached identities."""
+    _CACHE.clear()
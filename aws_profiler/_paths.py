@@ -0,0 +1,32 @@
+"""Locations of the AWS CLI's shared files."""
+
+import functools
+from pathlib import Path
+
+
+@functools.lru_cache(maxsize=4)
+def _aws_paths(home):
+    """Build the ~/.aws directory, credentials and config paths for a home directory."""
+    aws = home / '.aws'
+    return aws, aws / 'credentials', aws / 'config'
+
+
+def aws_dir():
+    """
+    Get the ~/.aws directory.
+    
+    The home directory is looked up on each call rather than at import so a
+    patched Path.home() (as in the tests) is honored; only the paths derived
+    from it are cached.
+    """
+    return _aws_paths(Path.home())[0]
+
+
+def credentials_path():
+    """Get the path of the shared credentials file."""
+    return _aws_paths(Path.home())[1]
+
+
+def config_path():
+    """Get the path of the shared config file."""
+    return _aws_paths(Path.home())[2]
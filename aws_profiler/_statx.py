@@ -0,0 +1,107 @@
+"""Lightweight file metadata lookups via Linux statx(2)."""
+
+import ctypes
+import functools
+import os
+import sys
+
+_AT_FDCWD = -100
+
+# Don't force network filesystems to revalidate cached attributes
+_AT_STATX_DONT_SYNC = 0x4000
+
+_STATX_MTIME = 0x40
+_STATX_INO = 0x100
+_STATX_SIZE = 0x200
+_STATX_KEY_MASK = _STATX_MTIME | _STATX_INO | _STATX_SIZE
+
+
+class _StatxTimestamp(ctypes.Structure):
+    _fields_ = [
+        ('tv_sec', ctypes.c_int64),
+        ('tv_nsec', ctypes.c_uint32),
+        ('__reserved', ctypes.c_int32),
+    ]
+
+
+class _Statx(ctypes.Structure):
+    _fields_ = [
+        ('stx_mask', ctypes.c_uint32),
+        ('stx_blksize', ctypes.c_uint32),
+        ('stx_attributes', ctypes.c_uint64),
+        ('stx_nlink', ctypes.c_uint32),
+        ('stx_uid', ctypes.c_uint32),
+        ('stx_gid', ctypes.c_uint32),
+        ('stx_mode', ctypes.c_uint16),
+        ('__spare0', ctypes.c_uint16),
+        ('stx_ino', ctypes.c_uint64),
+        ('stx_size', ctypes.c_uint64),
+        ('stx_blocks', ctypes.c_uint64),
+        ('stx_attributes_mask', ctypes.c_uint64),
+        ('stx_atime', _StatxTimestamp),
+        ('stx_btime', _StatxTimestamp),
+        ('stx_ctime', _StatxTimestamp),
+        ('stx_mtime', _StatxTimestamp),
+        # Device numbers and room for fields added by newer kernels
+        ('__rest', ctypes.c_uint8 * 128),
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def _libc_statx():
+    """Get a working libc statx function, or None where it isn't available."""
+    if sys.platform != 'linux':
+        return None
+    
+    try:
+        statx = ctypes.CDLL(None, use_errno=True).statx
+    except AttributeError:
+        # libc older than statx (glibc < 2.28)
+        return None
+    
+    statx.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_uint, ctypes.POINTER(_Statx)]
+    statx.restype = ctypes.c_int
+    
+    # The kernel may still lack it, or a seccomp filter may block it
+    if statx(_AT_FDCWD, b'/', _AT_STATX_DONT_SYNC, _STATX_KEY_MASK, ctypes.byref(_Statx())) != 0:
+        return None
+    return statx
+
+
+def _stat_key_fallback(path):
+    stat_result = os.stat(path)
+    return stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size
+
+
+def stat_key(path):
+    """
+    Get the inode, modification time and size of a file.
+    
+    On Linux only these fields are requested from statx(2), without forcing
+    a network filesystem to revalidate its cached attributes. Elsewhere, or
+    when the kernel lacks statx, os.stat() is used instead.
+    
+    Args:
+        path: Path to the file (symlinks are followed)
+        
+    Returns:
+        tuple: (st_ino, st_mtime_ns, st_size)
+        
+    Raises:
+        OSError: If the file can't be examined, e.g. FileNotFoundError
+    """
+    statx = _libc_statx()
+    if statx is None:
+        return _stat_key_fallback(path)
+    
+    buf = _Statx()
+    if statx(_AT_FDCWD, os.fsencode(path), _AT_STATX_DONT_SYNC, _STATX_KEY_MASK, ctypes.byref(buf)) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err), os.fspath(path))
+    
+    if buf.stx_mask & _STATX_KEY_MASK != _STATX_KEY_MASK:
+        # The filesystem couldn't supply every field
+        return _stat_key_fallback(path)
+    
+    mtime_ns = buf.stx_mtime.tv_sec * 1_000_000_000 + buf.stx_mtime.tv_nsec
+    return buf.stx_ino, mtime_ns, buf.stx_size
@@ -1,101 +1,221 @@
 """AWS account information retrieval."""
 
-import boto3
-from botocore.exceptions import ClientError, NoCredentialsError, ProfileNotFound
+import functools
+import re
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
+import botocore.session
+from botocore.exceptions import (
+    ClientError,
+    ConnectTimeoutError,
+    NoCredentialsError,
+    ProfileNotFound,
+    ReadTimeoutError,
+)
+
+from ._clients import sts_client
 from .credentials import get_credential_age, get_credential_expiration
+from .profiles import precheck_expiry
+
+
+# Captures the principal type and the final path segment (user/session name)
+_ARN_RE = re.compile(
+    r'^arn:aws[^:]*:[^:]*::\d+:(?P<kind>assumed-role|user|role|federated-user)/(?:[^/]+/)*(?P<name>[^/]+)$'
+)
+
+_CREDENTIAL_TYPES = {
+    'assumed-role': 'Role',
+    'role': 'Role',
+    'user': 'User',
+    'federated-user': 'User',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_session(profile_name):
+    """Get a botocore session for a profile, created once per process."""
+    # Only STS is used here, so boto3's resource layer would be pure overhead
+    return botocore.session.Session(profile=profile_name)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_sts(profile_name):
+    """Get an STS client for a profile, built from its cached session."""
+    return sts_client(_get_session(profile_name))
+
+
+def _active_info(profile_name, identity, credential_age, expiration_info):
+    """Build the account info for a profile whose identity was retrieved."""
+    account_id = identity.get('Account', 'N/A')
+    user_arn = identity.get('Arn', 'N/A')
+    
+    # Extract user/role name from ARN
+    match = _ARN_RE.match(user_arn)
+    if match:
+        credential_type = _CREDENTIAL_TYPES[match.group('kind')]
+        user_name = match.group('name')
+    else:
+        user_name = 'N/A'
+        credential_type = 'Unknown'
+    
+    return {
+        'profile': profile_name,
+        'account_id': account_id,
+        'user_name': user_name,
+        'credential_type': credential_type,
+        'arn': user_arn,
+        'status': 'Active',
+        'credential_age': credential_age,
+        'expires_in': expiration_info['expires_in'],
+        'expiration_date': expiration_info['expiration_date']
+    }
+
+
+def _unavailable_info(profile_name, status, expires_in='N/A'):
+    """Build the account info for a profile whose identity is unavailable."""
+    return {
+        'profile': profile_name,
+        'account_id': 'N/A',
+        'user_name': 'N/A',
+        'credential_type': 'N/A',
+        'arn': 'N/A',
+        'status': status,
+        'credential_age': 'N/A',
+        'expires_in': expires_in,
+        'expiration_date': 'N/A'
+    }
+
+
+def _timeout_info(profile_name):
+    """Build the account info for a profile whose check timed out."""
+    return _unavailable_info(profile_name, 'Error: Timeout')
+
+
+def _precheck_info(profile_name):
+    """Build the account info from local files alone, or None if STS must be asked."""
+    status = precheck_expiry(profile_name)
+    if status is None:
+        return None
+    if status == 'Expired':
+        return _unavailable_info(profile_name, status, expires_in='Expired')
+    return _unavailable_info(profile_name, status)
+
+
+def _error_info(profile_name, error):
+    """Build the account info for a profile whose check raised an error."""
+    if isinstance(error, ClientError):
+        error_code = error.response['Error']['Code']
+        if error_code in ['ExpiredToken', 'InvalidClientTokenId']:
+            return _unavailable_info(profile_name, 'Expired', expires_in='Expired')
+        return _unavailable_info(profile_name, f'Error: {error_code}')
+    
+    if isinstance(error, (NoCredentialsError, ProfileNotFound)):
+        return _unavailable_info(profile_name, 'No Credentials')
+    
+    if isinstance(error, (ConnectTimeoutError, ReadTimeoutError)):
+        return _timeout_info(profile_name)
+    
+    return _unavailable_info(profile_name, f'Error: {str(error)[:30]}')
 
 
 def get_account_info(profile_name):
     """Get AWS account information and credential status for a profile."""
     try:
-        session = boto3.Session(profile_name=profile_name)
-        sts_client = session.client('sts')
+        session = _get_session(profile_name)
+        sts = _get_sts(profile_name)
         
         # Get caller identity
-        identity = sts_client.get_caller_identity()
-        
-        account_id = identity.get('Account', 'N/A')
-        user_arn = identity.get('Arn', 'N/A')
-        
-        # Extract user/role name from ARN
-        if 'assumed-role' in user_arn:
-            user_name = user_arn.split('/')[-1]
-            credential_type = 'Role'
-        elif 'user' in user_arn:
-            user_name = user_arn.split('/')[-1]
-            credential_type = 'User'
-        else:
-            user_name = 'N/A'
-            credential_type = 'Unknown'
-        
-        status = 'Active'
+        identity = sts.get_caller_identity()
         
         # Get credential age and expiration info
         credential_age = get_credential_age(profile_name)
-        expiration_info = get_credential_expiration(session)
+        expiration_info = get_credential_expiration(session, sts_client=sts)
         
-        return {
-            'profile': profile_name,
-            'account_id': account_id,
-            'user_name': user_name,
-            'credential_type': credential_type,
-            'arn': user_arn,
-            'status': status,
-            'credential_age': credential_age,
-            'expires_in': expiration_info['expires_in'],
-            'expiration_date': expiration_info['expiration_date']
-        }
+        return _active_info(profile_name, identity, credential_age, expiration_info)
+    
+    except Exception as e:
+        return _error_info(profile_name, e)
+
+
+def get_account_info_bulk(profiles, on_result=None, timeout=None):
+    """
+    Get account information for many profiles concurrently.
+    
+    Each check is a blocking STS round-trip, so they run on a thread pool and
+    the total wall time approaches the slowest call rather than the sum.
+    
+    Args:
+        profiles: List of AWS profile names
+        on_result: Optional callback ``on_result(profile, info)`` invoked on
+            the calling thread as each profile completes
+        timeout: Optional upper bound in seconds on each profile check,
+            counted from when the check starts; a check that runs longer
+            gets a timeout result
         
-    except ClientError as e:
-        error_code = e.response['Error']['Code']
-        if error_code in ['ExpiredToken', 'InvalidClientTokenId']:
-            return {
-                'profile': profile_name,
-                'account_id': 'N/A',
-                'user_name': 'N/A',
-                'credential_type': 'N/A',
-                'arn': 'N/A',
-                'status': 'Expired',
-                'credential_age': 'N/A',
-                'expires_in': 'Expired',
-                'expiration_date': 'N/A'
-            }
-        else:
-            return {
-                'profile': profile_name,
-                'account_id': 'N/A',
-                'user_name': 'N/A',
-                'credential_type': 'N/A',
-                'arn': 'N/A',
-                'status': f'Error: {error_code}',
-                'credential_age': 'N/A',
-                'expires_in': 'N/A',
-                'expiration_date': 'N/A'
-            }
+    Returns:
+        list: Account info dicts in the same order as ``profiles``
+    """
+    if not profiles:
+        return []
     
-    except (NoCredentialsError, ProfileNotFound):
-        return {
-            'profile': profile_name,
-            'account_id': 'N/A',
-            'user_name': 'N/A',
-            'credential_type': 'N/A',
-            'arn': 'N/A',
-            'status': 'No Credentials',
-            'credential_age': 'N/A',
-            'expires_in': 'N/A',
-            'expiration_date': 'N/A'
-        }
+    results = {}
     
-    except Exception as e:
-        return {
-            'profile': profile_name,
-            'account_id': 'N/A',
-            'user_name': 'N/A',
-            'credential_type': 'N/A',
-            'arn': 'N/A',
-            'status': f'Error: {str(e)[:30]}',
-            'credential_age': 'N/A',
-            'expires_in': 'N/A',
-            'expiration_date': 'N/A'
-        }
+    def record(profile, info):
+        results[profile] = info
+        if on_result is not None:
+            on_result(profile, info)
+    
+    max_workers = min(32, len(profiles))
+    queued = deque(profiles)
+    # Future -> (profile, monotonic deadline or None)
+    in_flight = {}
+    # Timed-out checks whose threads may still be busy
+    abandoned = set()
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while queued or in_flight:
+            abandoned = {future for future in abandoned if not future.done()}
+            
+            # Only submit to a free thread, so a check starts as soon as it is
+            # submitted and its deadline can be counted from then
+            while queued and len(in_flight) + len(abandoned) < max_workers:
+                profile = queued.popleft()
+                deadline = time.monotonic() + timeout if timeout is not None else None
+                in_flight[executor.submit(get_account_info, profile)] = (profile, deadline)
+            
+            if not in_flight:
+                # Every thread is stuck on a hung check; give them one more
+                # timeout to free up before giving up on the rest
+                done, _ = wait(abandoned, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    for profile in queued:
+                        record(profile, _timeout_info(profile))
+                    break
+                continue
+            
+            deadlines = [deadline for _, deadline in in_flight.values() if deadline is not None]
+            wait_for = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            done, _ = wait(in_flight, timeout=wait_for, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                profile, _ = in_flight.pop(future)
+                record(profile, future.result())
+            
+            now = time.monotonic()
+            for future, (profile, deadline) in list(in_flight.items()):
+                if deadline is not None and now >= deadline:
+                    del in_flight[future]
+                    abandoned.add(future)
+                    record(profile, _timeout_info(profile))
+    finally:
+        # Nothing is queued inside the executor, but an interrupted run may
+        # leave submitted checks that haven't started yet
+        for future in in_flight:
+            future.cancel()
+        # Don't wait for hung checks; their results are no longer needed
+        executor.shutdown(wait=False)
+    
+    return [results[profile] for profile in profiles]
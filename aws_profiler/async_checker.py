@@ -0,0 +1,113 @@
+"""
+Asynchronous profile checks built on aiobotocore.
+
+This is an optional alternative to the thread pool used by the CLI: a single
+event loop drives every STS request, which scales to many more concurrent
+profiles with less overhead than one thread per request. It is only used when
+``aiobotocore`` is installed (``pip install aws-profiler[async]``).
+"""
+
+import asyncio
+from datetime import datetime
+
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import AioSession
+except ImportError:  # pragma: no cover - depends on installed extras
+    AioConfig = AioSession = None
+
+from ._clients import sts_config, use_regional_sts
+from .account_info import _active_info, _error_info, _timeout_info
+from .credentials import get_credential_age, _format_expiration
+
+AIOBOTOCORE_AVAILABLE = AioSession is not None
+
+# Upper bound on a single profile check, including credential resolution
+PROFILE_CHECK_TIMEOUT = 5
+
+
+async def _get_expiration(session):
+    """Get credential expiration information for an aiobotocore session."""
+    try:
+        credentials = await session.get_credentials()
+        frozen = await credentials.get_frozen_credentials()
+        
+        if not frozen.token:
+            # Permanent credentials (IAM users)
+            return {
+                'expires_in': 'Permanent',
+                'expiration_date': 'Never'
+            }
+        
+        expiration = getattr(credentials, '_expiry_time', None)
+        if isinstance(expiration, datetime):
+            return _format_expiration(expiration)
+        
+        return {
+            'expires_in': 'Temporary',
+            'expiration_date': 'N/A'
+        }
+    
+    except Exception:
+        return {
+            'expires_in': 'N/A',
+            'expiration_date': 'N/A'
+        }
+
+
+async def _check_profile(profile_name):
+    """Get AWS account information and credential status for a profile."""
+    try:
+        session = AioSession(profile=profile_name)
+        use_regional_sts(session)
+        region = session.get_config_variable('region') or 'us-east-1'
+        
+        async with session.create_client(
+            'sts',
+            region_name=region,
+            config=sts_config(AioConfig)
+        ) as sts:
+            identity = await sts.get_caller_identity()
+        
+        credential_age = get_credential_age(profile_name)
+        expiration_info = await _get_expiration(session)
+        
+        return _active_info(profile_name, identity, credential_age, expiration_info)
+    
+    except Exception as e:
+        return _error_info(profile_name, e)
+
+
+async def _check_all(profiles, on_result):
+    """Check all profiles concurrently on the running event loop."""
+    async def check(profile_name):
+        try:
+            info = await asyncio.wait_for(_check_profile(profile_name), PROFILE_CHECK_TIMEOUT)
+        except asyncio.TimeoutError:
+            info = _timeout_info(profile_name)
+        if on_result is not None:
+            on_result(profile_name, info)
+        return info
+    
+    return await asyncio.gather(*(check(profile) for profile in profiles))
+
+
+def check_profiles_async(profiles, on_result=None):
+    """
+    Fetch account information for all profiles on one event loop.
+    
+    Args:
+        profiles: List of AWS profile names
+        on_result: Optional callback ``on_result(profile, info)`` invoked as
+            each profile completes
+        
+    Returns:
+        list: Account info dicts in the same order as ``profiles``
+        
+    Raises:
+        RuntimeError: If aiobotocore is not installed
+    """
+    if not AIOBOTOCORE_AVAILABLE:
+        raise RuntimeError('aiobotocore is required for asynchronous profile checks')
+    
+    return asyncio.run(_check_all(profiles, on_result))
@@ -1,14 +1,128 @@
 """Credential backup functionality."""
 
-import configparser
+import json
+import os
+import tempfile
 from pathlib import Path
 from datetime import datetime
 
+from . import _paths
+
+# Number of recent backups remembered so retried refreshes reuse them
+BACKUP_INDEX_SIZE = 5
+
+BACKUP_INDEX_NAME = '.profiler_backup_index.json'
+
+
+def _extract_section_bytes(path, section):
+    """
+    Read a single section of an INI file verbatim.
+    
+    The file is streamed line by line in binary mode and only the target
+    section is kept, so the rest of the file is never decoded, parsed or
+    held in memory.
+    
+    Args:
+        path: Path to the INI file
+        section: Name of the section to extract
+        
+    Returns:
+        bytes: The section including its header and a trailing newline, or
+        None if the section (or file) doesn't exist
+    """
+    header = b'[' + section.encode('utf-8') + b']'
+    lines = None
+    
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.startswith(b'['):
+                    if lines is not None:
+                        break
+                    if line.rstrip() == header:
+                        lines = []
+                if lines is not None:
+                    lines.append(line)
+    except FileNotFoundError:
+        return None
+    
+    if lines is None:
+        return None
+    
+    data = b''.join(lines)
+    return data if data.endswith(b'\n') else data + b'\n'
+
+
+def _load_backup_index(index_path):
+    """Read the recent-backups index, most recent last; unreadable means empty."""
+    try:
+        entries = json.loads(index_path.read_text())
+    except (OSError, ValueError):
+        return []
+    
+    if not isinstance(entries, list):
+        return []
+    return [entry for entry in entries if isinstance(entry, dict)]
+
+
+def _save_backup_index(index_path, entries):
+    """Write the recent-backups index, keeping only the newest entries."""
+    data = json.dumps(entries[-BACKUP_INDEX_SIZE:])
+    
+    # mkstemp creates the file with mode 0600
+    fd, tmp_path = tempfile.mkstemp(dir=index_path.parent, prefix=f'{index_path.name}.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _find_backup(entries, profile_name, access_key_id):
+    """Get the path of a remembered backup of this key that still exists, or None."""
+    for entry in reversed(entries):
+        if entry.get('profile') == profile_name and entry.get('access_key_id') == access_key_id:
+            backup_file = entry.get('backup_file')
+            if not isinstance(backup_file, str) or not backup_file:
+                continue
+            backup_path = Path(backup_file)
+            if backup_path.is_file():
+                return backup_path
+    return None
+
+
+def _create_backup_file(backup_dir, backup_filename):
+    """
+    Exclusively create a new owner-only backup file.
+    
+    If the name is already taken (two backups within the same clock tick),
+    a _1, _2, ... suffix is appended until an unused name is found.
+    
+    Returns:
+        tuple: (file descriptor open for writing, Path of the created file)
+    """
+    backup_path = backup_dir / backup_filename
+    suffix = 0
+    while True:
+        try:
+            fd = os.open(backup_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            suffix += 1
+            backup_path = backup_dir / f'{backup_filename}_{suffix}'
+            continue
+        return fd, backup_path
+
 
 def backup_credentials(profile_name, access_key_id):
     """
     Backup current credentials to a timestamped backup file.
     
+    A refresh retried after a transient AWS error backs up the same key
+    again, so the last few backups are remembered in an index under ~/.aws
+    and an existing backup of the same profile and key is reused.
+    
     Args:
         profile_name: Name of the AWS profile
         access_key_id: Access key ID being backed up
@@ -16,39 +130,55 @@ def backup_credentials(profile_name, access_key_id):
     Returns:
         dict: Result with success status and backup file path
     """
-    credentials_path = Path.home() / '.aws' / 'credentials'
-    aws_dir = credentials_path.parent
+    credentials_path = _paths.credentials_path()
+    aws_dir = _paths.aws_dir()
     backup_dir = aws_dir / 'backups'
     
-    # Create backup directory if it doesn't exist
-    backup_dir.mkdir(exist_ok=True)
+    index_path = aws_dir / BACKUP_INDEX_NAME
     
     try:
-        # Read current credentials
-        config = configparser.ConfigParser()
-        config.read(credentials_path)
+        # Create backup directory if it doesn't exist
+        backup_dir.mkdir(exist_ok=True)
+        
+        index = _load_backup_index(index_path)
         
-        if profile_name not in config.sections():
+        existing = _find_backup(index, profile_name, access_key_id)
+        if existing is not None:
+            return {
+                'success': True,
+                'backup_file': str(existing)
+            }
+        
+        # Read the profile's section from the current credentials
+        section = _extract_section_bytes(credentials_path, profile_name)
+        
+        if section is None:
             return {
                 'success': False,
                 'message': f'Profile "{profile_name}" not found in credentials file'
             }
         
         # Create backup filename with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
         backup_filename = f'credentials_backup_{profile_name}_{access_key_id[-8:]}_{timestamp}'
-        backup_path = backup_dir / backup_filename
-        
-        # Create a new config with only the profile being backed up
-        backup_config = configparser.ConfigParser()
-        backup_config[profile_name] = config[profile_name]
         
-        # Write backup
-        with open(backup_path, 'w') as f:
-            backup_config.write(f)
+        # Write backup containing only the profile being backed up
+        # Created owner-only from the start, so the secrets are never readable
+        # by others, and never over an existing backup
+        fd, backup_path = _create_backup_file(backup_dir, backup_filename)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(section)
         
-        # Set restrictive permissions (read/write for owner only)
-        backup_path.chmod(0o600)
+        index.append({
+            'profile': profile_name,
+            'access_key_id': access_key_id,
+            'backup_file': str(backup_path),
+        })
+        try:
+            _save_backup_index(index_path, index)
+        except OSError:
+            # The backup itself succeeded; it just won't be reused
+            pass
         
         return {
             'success': True,
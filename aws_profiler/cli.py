@@ -1,10 +1,14 @@
 """Command-line interface for AWS Profile Checker."""
 
+import os
 import sys
+import json
 import argparse
 import shutil
-from tabulate import tabulate
-from .checker import get_aws_profiles, get_account_info, refresh_credentials, is_sso_profile
+from collections import Counter
+
+# boto3 and tabulate are imported inside the code paths that need them, so
+# --help and argument errors don't pay their import cost
 
 
 def truncate_string(text, max_length):
@@ -14,22 +18,119 @@ def truncate_string(text, max_length):
     return text[:max_length-3] + "..."
 
 
+_STATUS_SYMBOLS = {
+    'Active': '✓ Active',
+    'Expired': '✗ Expired',
+    'No Credentials': '⚠ No Creds',
+}
+
+
 def get_status_symbol(status):
     """Get colored symbol for status."""
-    if status == 'Active':
-        return '✓ Active'
-    elif status == 'Expired':
-        return '✗ Expired'
-    elif status == 'No Credentials':
-        return '⚠ No Creds'
-    elif status.startswith('Error:'):
-        return '✗ Invalid'
-    else:
-        return '✗ Invalid'
+    # Errors and anything unrecognized display as invalid
+    return _STATUS_SYMBOLS.get(status, '✗ Invalid')
+
+
+def render_table(rows, headers):
+    """
+    Render rows as a box-drawn grid in the style of tabulate's fancy_grid.
+    
+    Column widths are measured in one pass and every row is emitted through
+    a single precomputed format string, which is much cheaper than tabulate
+    for long profile lists. All cells are left-aligned.
+    
+    Args:
+        rows: List of row lists
+        headers: List of column headers
+        
+    Returns:
+        str: Rendered table
+    """
+    cells = [[str(cell) for cell in row] for row in rows]
+    widths = [max(map(len, column)) for column in zip(headers, *cells)]
+    row_format = '│ ' + ' │ '.join(f'{{:<{width}}}' for width in widths) + ' │'
+    
+    def border(left, fill, middle, right):
+        return left + middle.join(fill * (width + 2) for width in widths) + right
+    
+    lines = [
+        border('╒', '═', '╤', '╕'),
+        row_format.format(*headers),
+        border('╞', '═', '╪', '╡'),
+    ]
+    row_separator = border('├', '─', '┼', '┤')
+    for index, row in enumerate(cells):
+        if index:
+            lines.append(row_separator)
+        lines.append(row_format.format(*row))
+    lines.append(border('╘', '═', '╧', '╛'))
+    
+    return '\n'.join(lines)
+
+
+def check_profiles(profiles, show_progress=False):
+    """
+    Fetch account information for all profiles concurrently.
+    
+    Each profile costs an STS round-trip, so the calls are dispatched on a
+    thread pool (or a single event loop when aiobotocore is installed) and
+    the total wall time approaches the slowest call rather than the sum of
+    all of them.
+    
+    Args:
+        profiles: List of AWS profile names
+        show_progress: If True, print each profile's status as it completes
+        
+    Returns:
+        list: Account info dicts in the same order as ``profiles``
+    """
+    from .account_info import get_account_info_bulk, _precheck_info
+    from .async_checker import AIOBOTOCORE_AVAILABLE, PROFILE_CHECK_TIMEOUT, check_profiles_async
+    
+    if not profiles:
+        return []
+    
+    results = {}
+    
+    def record(profile, info):
+        info['status_display'] = get_status_symbol(info['status'])
+        results[profile] = info
+        if show_progress:
+            print(f"   Checking {profile}... [{info['status_display']}]")
+    
+    # Profiles that local files already show to be unusable skip STS entirely
+    remote_profiles = []
+    for profile in profiles:
+        info = _precheck_info(profile)
+        if info is not None:
+            record(profile, info)
+        else:
+            remote_profiles.append(profile)
+    
+    if remote_profiles and AIOBOTOCORE_AVAILABLE:
+        check_profiles_async(remote_profiles, on_result=record)
+    elif remote_profiles:
+        get_account_info_bulk(remote_profiles, on_result=record, timeout=PROFILE_CHECK_TIMEOUT)
+    
+    return [results[profile] for profile in profiles]
+
+
+def list_profiles_json():
+    """Write all AWS profiles and their status to stdout as JSON."""
+    from .profiles import get_aws_profiles
+    
+    results = check_profiles(get_aws_profiles())
+    # status_display is only meant for the terminal table
+    for result in results:
+        result.pop('status_display', None)
+    
+    sys.stdout.write(json.dumps(results, default=str) + '\n')
 
 
 def list_profiles():
     """List all AWS profiles and their status."""
+    from .profiles import get_aws_profiles
+    
     # Get terminal width
     terminal_width = shutil.get_terminal_size().columns
     
@@ -47,13 +148,7 @@ def list_profiles():
     print(f"📋 Found {len(profiles)} profile(s)\n")
     
     # Collect information for all profiles
-    results = []
-    for profile in profiles:
-        print(f"   Checking {profile}...", end=' ')
-        info = get_account_info(profile)
-        results.append(info)
-        status_display = get_status_symbol(info['status'])
-        print(f"[{status_display}]")
+    results = check_profiles(profiles, show_progress=True)
     
     print()
     
@@ -65,19 +160,24 @@ def list_profiles():
             result['account_id'],
             result['user_name'],
             result['credential_type'],
-            get_status_symbol(result['status']),
+            result['status_display'],
             result.get('credential_age', 'N/A'),
             result.get('expires_in', 'N/A')
         ])
     
-    # Print table with fancy grid
+    # Print table with fancy grid, or plain text on terminals without box drawing
     headers = ['Profile', 'Account ID', 'User/Role', 'Type', 'Status', 'Age', 'Expires In']
-    print(tabulate(table_data, headers=headers, tablefmt='fancy_grid'))
+    if os.environ.get('TERM') == 'dumb':
+        from tabulate import tabulate
+        print(tabulate(table_data, headers=headers, tablefmt='simple'))
+    else:
+        print(render_table(table_data, headers))
     
     # Summary with emojis
     print()
-    active_count = sum(1 for r in results if r['status'] == 'Active')
-    expired_count = sum(1 for r in results if r['status'] == 'Expired')
+    status_counts = Counter(r['status'] for r in results)
+    active_count = status_counts['Active']
+    expired_count = status_counts['Expired']
     error_count = len(results) - active_count - expired_count
     
     print(f"📊 Summary: ✓ {active_count} active  |  ✗ {expired_count} expired  |  ⚠ {error_count} error/no credentials\n")
@@ -85,6 +185,9 @@ def list_profiles():
 
 def refresh_profile(profile_name, delete_old=False):
     """Refresh credentials for a specific profile."""
+    from .profiles import is_sso_profile
+    from .refresh import refresh_credentials
+    
     terminal_width = shutil.get_terminal_size().columns
     
     print("\n🔄 AWS Credential Refresh")
@@ -123,14 +226,18 @@ def refresh_profile(profile_name, delete_old=False):
 
 def refresh_all_profiles(delete_old=False):
     """Refresh credentials for all eligible profiles."""
+    from .profiles import get_aws_profiles, get_sso_profiles_set
+    from .refresh import refresh_credentials
+    
     terminal_width = shutil.get_terminal_size().columns
     
     print("\n🔄 AWS Credential Refresh - ALL PROFILES")
     print("=" * min(80, terminal_width))
     print()
     
-    # Get all profiles
+    # Get all profiles, and the SSO ones from a single scan of the config file
     profiles = get_aws_profiles()
+    sso_names = get_sso_profiles_set()
     
     if not profiles:
         print("❌ No AWS profiles found in ~/.aws/credentials or ~/.aws/config")
@@ -144,10 +251,9 @@ def refresh_all_profiles(delete_old=False):
     roles = []
     errors = []
     
-    for profile in profiles:
-        info = get_account_info(profile)
+    for profile, info in zip(profiles, check_profiles(profiles)):
         if info['status'] == 'Active':
-            if is_sso_profile(profile):
+            if profile in sso_names:
                 sso_profiles.append(profile)
             elif info['credential_type'] == 'User':
                 iam_users.append(profile)
@@ -229,6 +335,7 @@ def main():
         epilog="""
 Examples:
   aws-profiler                              # List all profiles and their status
+  aws-profiler --json                       # List profiles as JSON (for scripts)
   aws-profiler --refresh myprofile          # Refresh credentials for 'myprofile'
   aws-profiler --refresh myprofile --delete # Refresh and delete old key from AWS
   aws-profiler --refresh --all              # Refresh all IAM users and SSO profiles
@@ -256,10 +363,19 @@ Examples:
         help='Delete old access key from AWS after creating new one (use with --refresh)'
     )
     
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Print profile status as JSON instead of a table (cannot be used with --refresh)'
+    )
+    
     args = parser.parse_args()
     
     # Route to appropriate command
     if args.refresh:
+        if args.json:
+            print("❌ Error: --json cannot be used with --refresh")
+            return 1
         if args.all or args.refresh == '__flag_only__':
             # Refresh all profiles
             return refresh_all_profiles(delete_old=args.delete)
@@ -273,7 +389,10 @@ Examples:
         if args.all:
             print("❌ Error: --all can only be used with --refresh")
             return 1
-        list_profiles()
+        if args.json:
+            list_profiles_json()
+        else:
+            list_profiles()
         return 0
 
 
@@ -1,83 +1,150 @@
 """Credential age and expiration tracking."""
 
-import configparser
-from pathlib import Path
-from datetime import datetime, timezone
+import functools
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from . import _clients, _fs, _paths
+from .profiles import _scan_sections
+
+# Set to fall back to sts:GetSessionToken when credentials carry no expiry
+STS_EXPIRATION_ENV_VAR = 'AWS_PROFILER_STS_EXPIRATION'
+
+# SHA-256 of a session token -> expiration reported by STS for it
+_EXPIRATION_CACHE = {}
+
+# Stop reusing a cached expiration this close to it
+_EXPIRATION_MARGIN = timedelta(seconds=60)
+
+
+def _age_for_mtime(mtime_ns):
+    """Format the age of a file modified at ``mtime_ns``."""
+    # Not cached: the age depends on the current time as well as the mtime
+    age_seconds = max(0, int(time.time() - mtime_ns / 1e9))
+    days, remainder = divmod(age_seconds, 86400)
+    hours, remainder = divmod(remainder, 3600)
+    
+    if days > 0:
+        return f"{days}d {hours}h"
+    elif hours > 0:
+        return f"{hours}h"
+    else:
+        minutes = remainder // 60
+        return f"{minutes}m"
+
+
+@functools.lru_cache(maxsize=4)
+def _credential_sections(path_str, inode, mtime_ns, size):
+    """
+    Get the section names of the credentials file.
+    
+    The inode, modification time and size are only part of the cache key,
+    so a rewritten or replaced file is scanned again.
+    """
+    return frozenset(_scan_sections(path_str))
 
 
 def get_credential_age(profile_name):
     """Get the age of credentials based on file modification time."""
-    credentials_path = Path.home() / '.aws' / 'credentials'
-    
-    if not credentials_path.exists():
-        return 'N/A'
+    credentials_path = _paths.credentials_path()
     
     try:
-        config = configparser.ConfigParser()
-        config.read(credentials_path)
-        
-        if profile_name not in config.sections():
+        # One stat serves both the section lookup's cache key and the age,
+        # and is shared by every profile listed within one ~/.aws listing
+        stat_key = _fs.aws_file_key(credentials_path.name)
+        if stat_key is None:
             return 'N/A'
         
-        # Get file modification time
-        mtime = credentials_path.stat().st_mtime
-        mod_time = datetime.fromtimestamp(mtime, tz=timezone.utc)
-        now = datetime.now(timezone.utc)
-        age = now - mod_time
-        
-        days = age.days
-        hours = age.seconds // 3600
+        inode, mtime_ns, size = stat_key
+        sections = _credential_sections(str(credentials_path), inode, mtime_ns, size)
+        if profile_name not in sections:
+            return 'N/A'
         
-        if days > 0:
-            return f"{days}d {hours}h"
-        elif hours > 0:
-            return f"{hours}h"
-        else:
-            minutes = age.seconds // 60
-            return f"{minutes}m"
+        return _age_for_mtime(mtime_ns)
     
     except Exception:
         return 'N/A'
 
 
-def get_credential_expiration(session):
-    """Get credential expiration information."""
+def _format_expiration(expiration):
+    """Format an expiration datetime as time remaining plus a UTC date."""
+    now = datetime.now(timezone.utc)
+    time_left = expiration - now
+    
+    hours = int(time_left.total_seconds() // 3600)
+    minutes = int((time_left.total_seconds() % 3600) // 60)
+    
+    if hours > 0:
+        expires_in = f"{hours}h {minutes}m"
+    else:
+        expires_in = f"{minutes}m"
+    
+    return {
+        'expires_in': expires_in,
+        'expiration_date': expiration.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+    }
+
+
+def _sts_expiration(session, token, sts_client=None):
+    """
+    Get the expiration STS reports for a session token.
+    
+    The answer is reused for as long as the token stays valid, so listing
+    the same profile again doesn't cost another round-trip. Tokens are
+    cached by hash rather than kept in memory.
+    """
+    key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+    now = datetime.now(timezone.utc)
+    
+    expiration = _EXPIRATION_CACHE.get(key)
+    if expiration is not None and now < expiration - _EXPIRATION_MARGIN:
+        return expiration
+    
+    if sts_client is None:
+        sts_client = _clients.sts_client(session)
+    expiration = sts_client.get_session_token()['Credentials']['Expiration']
+    
+    # Drop entries for tokens that have expired since they were cached
+    for stale in [k for k, value in _EXPIRATION_CACHE.items() if value <= now]:
+        _EXPIRATION_CACHE.pop(stale, None)
+    _EXPIRATION_CACHE[key] = expiration
+    
+    return expiration
+
+
+def get_credential_expiration(session, *, sts_client=None):
+    """
+    Get credential expiration information.
+    
+    Args:
+        session: botocore or boto3 session for the profile
+        sts_client: STS client already built from the session, reused
+            instead of building another one if STS has to be asked
+    """
     try:
         # For temporary credentials (roles), check session token expiration
         credentials = session.get_credentials()
         
         if credentials.token:  # This is a session token (temporary credentials)
-            # Try to get session token expiration from STS
-            sts_client = session.client('sts')
+            # Refreshable credentials (SSO, assumed roles) already know their expiry
+            expiration = getattr(credentials, '_expiry_time', None)
+            if isinstance(expiration, datetime):
+                return _format_expiration(expiration)
+            
+            if os.environ.get(STS_EXPIRATION_ENV_VAR):
+                # Opt-in: ask STS, at the cost of an extra round-trip
+                try:
+                    return _format_expiration(_sts_expiration(session, credentials.token, sts_client))
+                except Exception:
+                    pass
             
-            # Get session token info
-            try:
-                # For assumed roles, we can check the expiration
-                # Note: This is a best-effort approach
-                response = sts_client.get_session_token()
-                expiration = response['Credentials']['Expiration']
-                
-                now = datetime.now(timezone.utc)
-                time_left = expiration - now
-                
-                hours = int(time_left.total_seconds() // 3600)
-                minutes = int((time_left.total_seconds() % 3600) // 60)
-                
-                if hours > 0:
-                    expires_in = f"{hours}h {minutes}m"
-                else:
-                    expires_in = f"{minutes}m"
-                
-                return {
-                    'expires_in': expires_in,
-                    'expiration_date': expiration.strftime('%Y-%m-%d %H:%M:%S UTC')
-                }
-            except Exception:
-                # If we can't get exact expiration, return approximate
-                return {
-                    'expires_in': 'Temporary',
-                    'expiration_date': 'N/A'
-                }
+            # If we can't get exact expiration, return approximate
+            return {
+                'expires_in': 'Temporary',
+                'expiration_date': 'N/A'
+            }
         else:
             # Permanent credentials (IAM users)
             return {
@@ -1,72 +1,353 @@
 """AWS profile discovery and configuration."""
 
-import configparser
-from pathlib import Path
+import functools
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+from datetime import datetime, timezone
 
+from . import _fs
+from ._config_cache import get_aws_config
+from ._paths import aws_dir, credentials_path, config_path
 
-def get_aws_profiles():
-    """Get list of all AWS profiles from credentials and config files."""
-    profiles = set()
+
+_PROFILE_PREFIX_LEN = len('profile ')
+
+# Files at least this large have their headers found by _SECTION_RE over a memory map
+_MMAP_THRESHOLD = 32 * 1024
+
+# A header line, matching _header_name: '[' in the first column and ']' as
+# the last non-blank character
+_SECTION_RE = re.compile(rb'^\[([^\n]+)\][^\S\n]*$', re.MULTILINE)
+
+# Options that make a config section an SSO profile
+_SSO_KEYS = ('sso_start_url', 'sso_session')
+
+
+def _header_name(line):
+    """
+    Get the section name of an INI header line, or None if it isn't one.
     
-    # Check credentials file
-    credentials_path = Path.home() / '.aws' / 'credentials'
-    if credentials_path.exists():
-        config = configparser.ConfigParser()
-        config.read(credentials_path)
-        profiles.update(config.sections())
+    A header has '[' in the first column (indented lines are value
+    continuations) and ']' as its last non-blank character. Works on both
+    str and bytes lines.
+    """
+    if line[:1] not in ('[', b'['):
+        return None
+    line = line.rstrip()
+    if len(line) > 2 and line[-1:] in (']', b']'):
+        return line[1:-1]
+    return None
+
+
+def _scan_sections(path):
+    """
+    Get the section names of an INI file without parsing its contents.
     
-    # Check config file
-    config_path = Path.home() / '.aws' / 'config'
-    if config_path.exists():
-        config = configparser.ConfigParser()
-        config.read(config_path)
-        for section in config.sections():
-            if section.startswith('profile '):
-                profiles.add(section.replace('profile ', ''))
-            else:
-                profiles.add(section)
+    Only ``[...]`` header lines are inspected, which is far cheaper than a
+    full configparser pass when just the profile names are needed. Large
+    files are memory-mapped and searched with a single regex, so no Python
+    object is created per line.
     
-    return sorted(list(profiles))
+    Args:
+        path: Path to the INI file
+        
+    Returns:
+        list: Section names in file order (empty if the file doesn't exist)
+    """
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size >= _MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return [match.group(1).decode('utf-8') for match in _SECTION_RE.finditer(mm)]
+            
+            sections = []
+            for line in f:
+                name = _header_name(line)
+                if name is not None:
+                    sections.append(name.decode('utf-8'))
+            return sections
+    except (FileNotFoundError, NotADirectoryError):
+        return []
 
 
-def is_sso_profile(profile_name):
-    """Check if a profile is configured for SSO."""
-    config_path = Path.home() / '.aws' / 'config'
+def _section_keys(path, sections=None):
+    """
+    Get the option names of some sections of an INI file without parsing it.
     
-    if not config_path.exists():
-        return False
+    The file is streamed once and only option names are collected, so no
+    values are interpolated or stored.
+    
+    Args:
+        path: Path to the INI file
+        sections: Names of the sections of interest, or None for all
+        
+    Returns:
+        dict: Lowercased option names for each requested section that exists
+    """
+    found = {}
+    keys = None
     
     try:
-        config = configparser.ConfigParser()
-        config.read(config_path)
+        with open(path) as f:
+            for line in f:
+                name = _header_name(line)
+                if name is not None:
+                    wanted = sections is None or name in sections
+                    keys = found.setdefault(name, set()) if wanted else None
+                elif keys is not None and line[:1] not in ('', ' ', '\t', '#', ';'):
+                    # Indented lines are value continuations; '#'/';' start comments
+                    key = line.split('=', 1)[0].split(':', 1)[0].strip()
+                    if key:
+                        keys.add(key.lower())
+    except (FileNotFoundError, NotADirectoryError):
+        return {}
+    
+    return found
+
+
+def _read_section_value(path, section, key):
+    """
+    Read one option of an INI file section without parsing the file.
+    
+    The file is streamed and reading stops as soon as the option is found
+    or the section ends, so usually only the start of the file is read.
+    
+    Args:
+        path: Path to the INI file
+        section: Name of the section
+        key: Option name (case-insensitive)
         
-        # Check both 'profile name' and 'name' sections
-        section_name = f'profile {profile_name}' if f'profile {profile_name}' in config.sections() else profile_name
+    Returns:
+        str: The stripped value, or None if the section or option (or the
+        file) doesn't exist
+    """
+    key = key.lower()
+    in_section = False
+    
+    try:
+        with open(path) as f:
+            for line in f:
+                name = _header_name(line)
+                if name is not None:
+                    if in_section:
+                        break
+                    in_section = name == section
+                elif in_section and line[:1] not in ('', ' ', '\t', '#', ';'):
+                    # The option name ends at the first '=' or ':'
+                    name = line.split('=', 1)[0].split(':', 1)[0]
+                    if len(name) < len(line) and name.strip().lower() == key:
+                        return line[len(name) + 1:].strip()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    
+    return None
+
+
+def _config_profile_names(sections):
+    """Get the profile names defined by some config file sections."""
+    # Only 'default' and 'profile X' sections of the config file are profiles;
+    # others such as [sso-session X] or [services X] are not
+    return (
+        section[_PROFILE_PREFIX_LEN:] if section.startswith('profile ') else section
+        for section in sections
+        if section == 'default' or section.startswith('profile ')
+    )
+
+
+def get_aws_profiles():
+    """Get list of all AWS profiles from credentials and config files."""
+    credentials_file = credentials_path()
+    config_file = config_path()
+    
+    has_credentials = _fs.aws_file_exists(credentials_file.name)
+    has_config = _fs.aws_file_exists(config_file.name)
+    
+    # Files missing from the ~/.aws listing aren't opened at all
+    profiles = set(_scan_sections(credentials_file)) if has_credentials else set()
+    config_sections = _scan_sections(config_file) if has_config else []
+    
+    profiles.update(_config_profile_names(config_sections))
+    
+    return sorted(profiles)
+
+
+def _profile_section(config, profile_name):
+    """Get the config section name for a profile, or None if it has none."""
+    # Check both 'profile name' and 'name' sections
+    for section_name in (f'profile {profile_name}', profile_name):
+        if config.has_section(section_name):
+            return section_name
+    return None
+
+
+def _sso_profile_names(found):
+    """
+    Get the names of the SSO profiles among a config file's sections.
+    
+    Args:
+        found: Section name -> the section's option names
         
-        if section_name in config.sections():
-            # Check for SSO configuration keys
-            return any(key in config[section_name] for key in ['sso_start_url', 'sso_session'])
+    Returns:
+        frozenset: Profile names configured for SSO
+    """
+    names = set()
+    for section in found:
+        name = section[_PROFILE_PREFIX_LEN:] if section.startswith('profile ') else section
+        # 'profile name' wins over a bare 'name' section
+        options = found.get(f'profile {name}', found[section])
+        if any(key in options for key in _SSO_KEYS):
+            names.add(name)
+    return frozenset(names)
+
+
+@functools.lru_cache(maxsize=4)
+def _sso_profiles(path_str, file_key):
+    """
+    Get the SSO profile names of a config file in one streamed pass.
     
+    The file's stat key (None if it doesn't exist) is only part of the
+    cache key, so the set is rebuilt whenever the file changes.
+    """
+    if file_key is None:
+        # Don't even try to open a file the ~/.aws listing doesn't have
+        return frozenset()
+    return _sso_profile_names(_section_keys(path_str))
+
+
+def get_sso_profiles_set():
+    """Get the names of all profiles configured for SSO."""
+    try:
+        path = config_path()
+        return _sso_profiles(str(path), _fs.aws_file_key(path.name))
     except Exception:
-        pass
+        return frozenset()
+
+
+def is_sso_profile(profile_name):
+    """Check if a profile is configured for SSO."""
+    return profile_name in get_sso_profiles_set()
+
+
+@functools.lru_cache(maxsize=128)
+def _access_key_id_cached(path_str, file_key, profile_name):
+    """
+    Read a profile's access key ID.
     
-    return False
+    The file's stat key (None if it doesn't exist) is only part of the
+    cache key, so answers, including negative ones, last until the file
+    changes.
+    """
+    if file_key is None:
+        return None
+    return _read_section_value(path_str, profile_name, 'aws_access_key_id')
 
 
 def get_current_access_key_id(profile_name):
     """Get the current access key ID for a profile."""
-    credentials_path = Path.home() / '.aws' / 'credentials'
-    
-    if not credentials_path.exists():
+    try:
+        path = credentials_path()
+        return _access_key_id_cached(str(path), _fs.aws_file_key(path.name), profile_name)
+    except Exception:
         return None
+
+
+def _command_exists(command_line):
+    """Check whether the executable of a command line can be found."""
+    # Split the way botocore does before running it, which keeps the
+    # backslashes of Windows paths; botocore is slow to import
+    from botocore.compat import compat_shell_split
+    
+    executable = compat_shell_split(command_line)[0]
+    if os.path.dirname(executable):
+        return os.path.exists(os.path.expanduser(executable))
+    return shutil.which(executable) is not None
+
+
+def _parse_token_time(value):
+    """Parse an SSO cache timestamp such as 2025-11-24T12:00:00Z."""
+    value = value.replace('UTC', '').rstrip('Z')
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _sso_token_path(cache_key):
+    """Get the path of the AWS CLI's cached SSO token for a session name or start URL."""
+    return (aws_dir() / 'sso' / 'cache' /
+            f"{hashlib.sha1(cache_key.encode('utf-8')).hexdigest()}.json")
+
+
+def _sso_token_expired(options):
+    """
+    Check whether the cached SSO token for a profile has expired for good.
+    
+    Tokens are cached by the AWS CLI under the SHA-1 of the sso-session name
+    (or of the start URL for legacy configs). An expired token still works if
+    it carries a refresh token and its client registration is still valid.
+    """
+    cache_key = options.get('sso_session') or options.get('sso_start_url')
+    if not cache_key:
+        return False
+    
+    try:
+        with open(_sso_token_path(cache_key)) as f:
+            token = json.load(f)
+    except (FileNotFoundError, NotADirectoryError):
+        # No cached token: let the normal check report it
+        return False
+    
+    now = datetime.now(timezone.utc)
+    if _parse_token_time(token['expiresAt']) > now:
+        return False
+    
+    registration_expires = token.get('registrationExpiresAt')
+    if token.get('refreshToken') and registration_expires:
+        return _parse_token_time(registration_expires) <= now
     
+    return True
+
+
+def precheck_expiry(profile_name):
+    """
+    Detect from local files alone that a profile's credentials can't work.
+    
+    Lets callers skip the STS round-trip for profiles whose SSO token has
+    expired or whose credential_process executable is missing.
+    
+    Args:
+        profile_name: Name of the AWS profile
+        
+    Returns:
+        str: 'Expired' or an 'Error: ...' status, or None if the profile
+        must be checked against STS
+    """
     try:
-        config = configparser.ConfigParser()
-        config.read(credentials_path)
+        config = get_aws_config()
+        if config is None:
+            return None
+        
+        section_name = _profile_section(config, profile_name)
+        if section_name is None:
+            return None
         
-        if profile_name in config.sections():
-            return config[profile_name].get('aws_access_key_id')
+        options = config[section_name]
+        
+        # botocore uses static keys from the credentials file before
+        # credential_process, so a missing helper only matters without them
+        credential_process = options.get('credential_process')
+        if (credential_process and not _command_exists(credential_process)
+                and get_current_access_key_id(profile_name) is None):
+            return 'Error: credential_process not found'
+        
+        if _sso_token_expired(options):
+            return 'Expired'
+    
     except Exception:
-        return None
+        pass
     
     return None
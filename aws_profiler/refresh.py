@@ -1,18 +1,315 @@
 """Credential refresh functionality for IAM users and SSO profiles."""
 
-import boto3
-import configparser
+import functools
+import json
+import os
+import re
 import subprocess
-from pathlib import Path
-from botocore.exceptions import ClientError
+import tempfile
+import time
+import webbrowser
+from datetime import datetime, timedelta, timezone
 
-from .profiles import is_sso_profile, get_current_access_key_id
+from . import _fs, _identity_cache, _paths
+from ._clients import REFRESH_CLIENT_CONFIG
+from ._config_cache import get_aws_config
+from .account_info import _ARN_RE
+from .profiles import is_sso_profile, get_current_access_key_id, _profile_section, _sso_token_path
 from .backup import backup_credentials
 
+# Set to log in through `aws sso login` instead of the built-in device flow
+SSO_LOGIN_CLI_ENV_VAR = 'AWS_PROFILER_SSO_LOGIN_CLI'
+
+_DEVICE_CODE_GRANT = 'urn:ietf:params:oauth:grant-type:device_code'
+
+
+def __getattr__(name):
+    # boto3 takes a few hundred milliseconds to import, so it is only loaded
+    # once a refresh needs it; `aws_profiler.refresh.boto3` still resolves
+    if name == 'boto3':
+        import boto3
+        return boto3
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.lru_cache(maxsize=32)
+def _get_session(profile_name):
+    """Get the boto3 session for a profile, created once per process."""
+    import boto3
+    return boto3.Session(profile_name=profile_name)
+
+
+@functools.lru_cache(maxsize=32)
+def _get_client(profile_name, service):
+    """Get a boto3 client for a profile, created once per process."""
+    return _get_session(profile_name).client(service, config=REFRESH_CLIENT_CONFIG)
+
+
+def _clear_session_cache():
+    """Drop cached sessions and clients so rotated keys are picked up."""
+    _get_client.cache_clear()
+    _get_session.cache_clear()
+
+
+def _ok(message):
+    """Build a successful refresh result."""
+    return {'success': True, 'message': message}
+
+
+def _fail(message):
+    """Build a failed refresh result."""
+    return {'success': False, 'message': message}
+
+
+_SECTION_HEADER_RE = re.compile(r'^\[', re.M)
+_KEY_LINE_RE = re.compile(r'\s*([^=:\s]+)\s*[=:]')
+
+
+def _patch_credentials_section(path, profile_name, values):
+    """
+    Set keys in one section of an INI file, leaving every other line as is.
+    
+    Unlike a configparser round-trip this keeps comments, ordering and
+    formatting of the rest of the file. The file is replaced atomically so
+    a crash mid-write can't leave it truncated.
+    
+    Args:
+        path: Path to the INI file
+        profile_name: Section to update
+        values: Mapping of key to new value; missing keys are appended
+        
+    Returns:
+        bool: False if the section doesn't exist
+    """
+    # newline='' keeps CRLF line endings, which are written back unchanged
+    with open(path, newline='') as f:
+        text = f.read()
+    newline = '\r\n' if '\r\n' in text else '\n'
+    
+    header = re.compile(rf'^\[{re.escape(profile_name)}\][ \t]*(?=\r?$)', re.M).search(text)
+    if header is None:
+        return False
+    
+    next_header = _SECTION_HEADER_RE.search(text, header.end())
+    end = next_header.start() if next_header else len(text)
+    # The first line is the remainder of the header line
+    lines = text[header.end():end].splitlines(keepends=True) or [newline]
+    
+    remaining = dict(values)
+    for i, line in enumerate(lines):
+        match = _KEY_LINE_RE.match(line)
+        if match and match.group(1).lower() in remaining:
+            key = match.group(1)
+            ending = line[len(line.rstrip('\r\n')):]
+            lines[i] = f'{key} = {remaining.pop(key.lower())}{ending}'
+    
+    if remaining:
+        # Append after the section's last non-blank line
+        insert_at = max((i + 1 for i, line in enumerate(lines) if line.strip()), default=1)
+        if not lines[insert_at - 1].endswith('\n'):
+            lines[insert_at - 1] += newline
+        lines[insert_at:insert_at] = [f'{key} = {value}{newline}' for key, value in remaining.items()]
+    
+    _atomic_write(path, (text[:header.end()] + ''.join(lines) + text[end:]).encode())
+    return True
+
+
+def _copy_owner(path, fd):
+    """Give an open file the owner and group of ``path``, if allowed."""
+    if not hasattr(os, 'fchown'):
+        return
+    try:
+        st = os.stat(path)
+        os.fchown(fd, st.st_uid, st.st_gid)
+    except OSError:
+        # Missing original, or not permitted to give the file away
+        pass
+
+
+def _atomic_write(path, data):
+    """
+    Replace a file's contents so readers see either the old or the new file.
+    
+    The data goes to a temporary file in the same directory, is flushed to
+    disk, and is then renamed over the original. A symlinked path is
+    resolved first so the link itself is kept, and the original file's
+    owner and group are carried over where permitted. The new file is
+    always mode 0600, since it holds secret keys.
+    """
+    target = os.path.realpath(path)
+    directory, name = os.path.split(target)
+    
+    # mkstemp creates the file with mode 0600
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{name}.')
+    try:
+        try:
+            _copy_owner(target, fd)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _sso_login_settings(profile_name):
+    """
+    Get the SSO settings needed to log in a profile from ~/.aws/config.
+    
+    Returns:
+        dict: ``start_url``, ``region``, ``cache_key`` and ``scopes``, or
+        None if the profile's SSO configuration can't be resolved
+    """
+    config = get_aws_config()
+    if config is None:
+        return None
+    
+    section_name = _profile_section(config, profile_name)
+    if section_name is None:
+        return None
+    
+    options = config[section_name]
+    session_name = options.get('sso_session')
+    if session_name:
+        # sso-session profiles keep their SSO settings in a shared section
+        # and cache the token under the session name
+        section_name = f'sso-session {session_name}'
+        if not config.has_section(section_name):
+            return None
+        options = config[section_name]
+    
+    start_url = options.get('sso_start_url')
+    region = options.get('sso_region')
+    if not start_url or not region:
+        return None
+    
+    scopes = options.get('sso_registration_scopes', '')
+    return {
+        'start_url': start_url,
+        'region': region,
+        'cache_key': session_name or start_url,
+        'scopes': [scope.strip() for scope in scopes.split(',') if scope.strip()],
+    }
+
+
+def _write_sso_token(settings, registration, token):
+    """Write an SSO access token to the cache location botocore reads it from."""
+    def iso(moment):
+        return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+    
+    now = datetime.now(timezone.utc)
+    cached = {
+        'startUrl': settings['start_url'],
+        'region': settings['region'],
+        'accessToken': token['accessToken'],
+        'expiresAt': iso(now + timedelta(seconds=token['expiresIn'])),
+        'clientId': registration['clientId'],
+        'clientSecret': registration['clientSecret'],
+        'registrationExpiresAt': iso(
+            datetime.fromtimestamp(registration['clientSecretExpiresAt'], tz=timezone.utc)
+        ),
+    }
+    if token.get('refreshToken'):
+        cached['refreshToken'] = token['refreshToken']
+    
+    token_path = _sso_token_path(settings['cache_key'])
+    token_path.parent.mkdir(parents=True, mode=0o700, exist_ok=True)
+    fd = os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(cached, f)
+
+
+def _sso_device_login(profile_name, settings):
+    """
+    Log in through the SSO OIDC device authorization flow.
+    
+    Does what `aws sso login` does without starting a second Python
+    interpreter: register a client, have the user approve the device in the
+    browser, then poll for the token.
+    
+    Args:
+        profile_name: Name of the AWS profile
+        settings: SSO settings from _sso_login_settings()
+        
+    Returns:
+        dict: Result with success status and message
+    """
+    import boto3
+    oidc = boto3.client('sso-oidc', region_name=settings['region'])
+    
+    register_args = {'clientName': 'aws-profiler', 'clientType': 'public'}
+    if settings['scopes']:
+        register_args['scopes'] = settings['scopes']
+    registration = oidc.register_client(**register_args)
+    client_credentials = {
+        'clientId': registration['clientId'],
+        'clientSecret': registration['clientSecret'],
+    }
+    
+    authorization = oidc.start_device_authorization(
+        startUrl=settings['start_url'], **client_credentials
+    )
+    print(f"   If the browser does not open, visit: {authorization['verificationUri']}")
+    print(f"   and enter the code: {authorization['userCode']}\n")
+    webbrowser.open(authorization['verificationUriComplete'])
+    
+    interval = authorization.get('interval') or 5
+    deadline = time.monotonic() + authorization['expiresIn']
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        try:
+            token = oidc.create_token(
+                grantType=_DEVICE_CODE_GRANT,
+                deviceCode=authorization['deviceCode'],
+                **client_credentials
+            )
+        except oidc.exceptions.AuthorizationPendingException:
+            continue
+        except oidc.exceptions.SlowDownException:
+            interval += 5
+            continue
+        
+        _write_sso_token(settings, registration, token)
+        return _ok(f'✓ SSO login successful for profile "{profile_name}"')
+    
+    return _fail('SSO login timed out waiting for browser authorization')
+
+
+def _sso_login_cli(profile_name):
+    """Log in by running `aws sso login` for the profile."""
+    try:
+        # Run aws sso login with the profile; its output goes straight to the user
+        process = subprocess.Popen(['aws', 'sso', 'login', '--profile', profile_name])
+    except FileNotFoundError:
+        return _fail('AWS CLI not found. Please install the AWS CLI to use SSO login.')
+    
+    with process:
+        try:
+            # wait() blocks without holding the GIL, so logins on other threads proceed
+            returncode = process.wait()
+        except BaseException:
+            # As subprocess.run does, don't leave the login running on Ctrl-C;
+            # leaving the with block reaps it
+            process.kill()
+            raise
+    
+    if returncode == 0:
+        return _ok(f'✓ SSO login successful for profile "{profile_name}"')
+    else:
+        return _fail(f'SSO login failed with exit code {returncode}')
+
 
 def refresh_sso_profile(profile_name):
     """
-    Refresh SSO profile by running aws sso login.
+    Refresh SSO profile by logging in again.
+    
+    Uses the SSO OIDC device flow directly, falling back to `aws sso login`
+    when the profile's SSO settings can't be resolved or when
+    AWS_PROFILER_SSO_LOGIN_CLI is set.
     
     Args:
         profile_name: Name of the AWS profile
@@ -24,34 +321,17 @@ def refresh_sso_profile(profile_name):
         print(f"🔐 Initiating SSO login for profile: {profile_name}")
         print("   Please follow the instructions in your browser...\n")
         
-        # Run aws sso login with the profile
-        result = subprocess.run(
-            ['aws', 'sso', 'login', '--profile', profile_name],
-            capture_output=False,  # Allow output to show to user
-            text=True
-        )
-        
-        if result.returncode == 0:
-            return {
-                'success': True,
-                'message': f'✓ SSO login successful for profile "{profile_name}"'
-            }
-        else:
-            return {
-                'success': False,
-                'message': f'SSO login failed with exit code {result.returncode}'
-            }
+        settings = None
+        if not os.environ.get(SSO_LOGIN_CLI_ENV_VAR):
+            settings = _sso_login_settings(profile_name)
+        
+        if settings is None:
+            return _sso_login_cli(profile_name)
+        
+        return _sso_device_login(profile_name, settings)
     
-    except FileNotFoundError:
-        return {
-            'success': False,
-            'message': 'AWS CLI not found. Please install the AWS CLI to use SSO login.'
-        }
     except Exception as e:
-        return {
-            'success': False,
-            'message': f'Error during SSO login: {str(e)}'
-        }
+        return _fail(f'Error during SSO login: {str(e)}')
 
 
 def refresh_iam_user_credentials(profile_name, delete_old=False):
@@ -65,83 +345,77 @@ def refresh_iam_user_credentials(profile_name, delete_old=False):
     Returns:
         dict: Result with success status and message
     """
-    credentials_path = Path.home() / '.aws' / 'credentials'
+    from botocore.exceptions import ClientError
+    
+    # Resolved once per call and reused for the existence check and the rewrite
+    credentials_path = _paths.credentials_path()
     
     if not credentials_path.exists():
-        return {
-            'success': False,
-            'message': 'Credentials file not found'
-        }
+        return _fail('Credentials file not found')
     
     try:
         # First, verify this is an IAM user and get current credentials
-        session = boto3.Session(profile_name=profile_name)
-        sts_client = session.client('sts')
+        sts_client = _get_client(profile_name, 'sts')
         
         # Get caller identity
-        identity = sts_client.get_caller_identity()
+        identity = _identity_cache.get_caller_identity_cached(sts_client, profile_name)
         user_arn = identity.get('Arn', '')
         
         # Check if this is an IAM user (not a role)
-        if 'assumed-role' in user_arn or ':user/' not in user_arn:
-            return {
-                'success': False,
-                'message': f'Profile "{profile_name}" is not an IAM user. Only IAM user credentials can be refreshed.'
-            }
+        match = _ARN_RE.match(user_arn)
+        if match is None or match.group('kind') != 'user':
+            return _fail(f'Profile "{profile_name}" is not an IAM user. Only IAM user credentials can be refreshed.')
         
-        # Extract username from ARN
-        username = user_arn.split('/')[-1]
+        username = match.group('name')
         
         # Get current access key ID
         old_access_key_id = get_current_access_key_id(profile_name)
         
         if not old_access_key_id:
-            return {
-                'success': False,
-                'message': f'Could not find access key ID for profile "{profile_name}"'
-            }
+            return _fail(f'Could not find access key ID for profile "{profile_name}"')
         
         # Create IAM client
-        iam_client = session.client('iam')
+        iam_client = _get_client(profile_name, 'iam')
         
-        # List current access keys to verify we don't exceed the limit
-        keys_response = iam_client.list_access_keys(UserName=username)
-        current_keys = keys_response['AccessKeyMetadata']
+        # Create new access key; IAM enforces the two-key limit itself, which
+        # saves a list_access_keys round-trip on the happy path
+        try:
+            new_key_response = iam_client.create_access_key(UserName=username)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'LimitExceeded':
+                raise
+            return _fail(f'User "{username}" already has 2 access keys. Please delete one before creating a new key.')
         
-        if len(current_keys) >= 2:
-            return {
-                'success': False,
-                'message': f'User "{username}" already has 2 access keys. Please delete one before creating a new key.'
-            }
+        new_access_key = new_key_response['AccessKey']
+        new_access_key_id = new_access_key['AccessKeyId']
+        new_secret_access_key = new_access_key['SecretAccessKey']
         
-        # Backup current credentials
+        # Backup current credentials only once the new key exists, so a
+        # refused refresh leaves no backup behind
         backup_result = backup_credentials(profile_name, old_access_key_id)
         
         if not backup_result['success']:
+            # Without a backup the file isn't touched, so the new key would
+            # be unused; don't leave it counting against the two-key limit
+            try:
+                iam_client.delete_access_key(UserName=username, AccessKeyId=new_access_key_id)
+            except Exception:
+                pass
             return backup_result
         
-        # Create new access key
-        new_key_response = iam_client.create_access_key(UserName=username)
-        new_access_key = new_key_response['AccessKey']
-        new_access_key_id = new_access_key['AccessKeyId']
-        new_secret_access_key = new_access_key['SecretAccessKey']
-        
         # Update credentials file with new keys
-        config = configparser.ConfigParser()
-        config.read(credentials_path)
-        
-        if profile_name in config.sections():
-            config[profile_name]['aws_access_key_id'] = new_access_key_id
-            config[profile_name]['aws_secret_access_key'] = new_secret_access_key
-            
-            # Write updated credentials
-            with open(credentials_path, 'w') as f:
-                config.write(f)
-        else:
-            return {
-                'success': False,
-                'message': f'Profile "{profile_name}" not found in credentials file'
-            }
+        updated = _patch_credentials_section(credentials_path, profile_name, {
+            'aws_access_key_id': new_access_key_id,
+            'aws_secret_access_key': new_secret_access_key,
+        })
+        
+        if not updated:
+            return _fail(f'Profile "{profile_name}" not found in credentials file')
+        
+        # Cached sessions and identities still belong to the old key
+        _clear_session_cache()
+        _identity_cache.invalidate(profile_name)
+        _fs.clear_cache()
         
         # Delete old key if requested
         if delete_old:
@@ -150,32 +424,24 @@ def refresh_iam_user_credentials(profile_name, delete_old=False):
                     UserName=username,
                     AccessKeyId=old_access_key_id
                 )
+                _identity_cache.invalidate(profile_name)
                 delete_message = f' Old key {old_access_key_id} deleted from AWS.'
             except Exception as e:
                 delete_message = f' Warning: Could not delete old key {old_access_key_id}: {str(e)}'
         else:
             delete_message = f' Old key {old_access_key_id} is still active in AWS. Use --delete to remove it.'
         
-        return {
-            'success': True,
-            'message': f'✓ Credentials refreshed successfully for profile "{profile_name}"\n'
-                      f'  New Key: {new_access_key_id}\n'
-                      f'  Backup: {backup_result["backup_file"]}\n'
-                      f'{delete_message}'
-        }
+        return _ok(f'✓ Credentials refreshed successfully for profile "{profile_name}"\n'
+                   f'  New Key: {new_access_key_id}\n'
+                   f'  Backup: {backup_result["backup_file"]}\n'
+                   f'{delete_message}')
         
     except ClientError as e:
         error_code = e.response['Error']['Code']
-        return {
-            'success': False,
-            'message': f'AWS Error ({error_code}): {e.response["Error"]["Message"]}'
-        }
+        return _fail(f'AWS Error ({error_code}): {e.response["Error"]["Message"]}')
     
     except Exception as e:
-        return {
-            'success': False,
-            'message': f'Error: {str(e)}'
-        }
+        return _fail(f'Error: {str(e)}')
 
 
 def refresh_credentials(profile_name, delete_old=False):
@@ -30,6 +30,9 @@ setup(
         "boto3>=1.26.0",
         "tabulate>=0.9.0",
     ],
+    extras_require={
+        "async": ["aiobotocore>=2.0.0"],
+    },
     entry_points={
         "console_scripts": [
             "aws-profiler=aws_profiler.cli:main",
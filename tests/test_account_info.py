@@ -1,32 +1,54 @@
 """Unit tests for aws_profiler.account_info module."""
 
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-from botocore.exceptions import ClientError, NoCredentialsError, ProfileNotFound
+import threading
+import time
+from unittest.mock import patch
+from botocore.exceptions import ClientError, NoCredentialsError, ProfileNotFound, ReadTimeoutError
 
-from aws_profiler.account_info import get_account_info
+from aws_profiler.account_info import get_account_info, get_account_info_bulk, _active_info
 
 
+class TestActiveInfo:
+    """Tests for ARN classification in _active_info()."""
+    
+    @pytest.mark.parametrize('arn,credential_type,user_name', [
+        ('arn:aws:iam::123456789012:user/john-doe', 'User', 'john-doe'),
+        ('arn:aws:iam::123456789012:user/engineering/developers/john', 'User', 'john'),
+        ('arn:aws:sts::123456789012:assumed-role/MyRole/session-name', 'Role', 'session-name'),
+        ('arn:aws-us-gov:sts::123456789012:assumed-role/MyRole/session', 'Role', 'session'),
+        ('arn:aws:sts::123456789012:federated-user/bob', 'User', 'bob'),
+        ('arn:aws:iam::123456789012:root', 'Unknown', 'N/A'),
+        ('N/A', 'Unknown', 'N/A'),
+    ])
+    def test_arn_classification(self, arn, credential_type, user_name):
+        """Test A-14: ARN type and name are parsed in one pass."""
+        expiration_info = {'expires_in': 'N/A', 'expiration_date': 'N/A'}
+        
+        result = _active_info('p', {'Arn': arn}, 'N/A', expiration_info)
+        
+        assert result['credential_type'] == credential_type
+        assert result['user_name'] == user_name
+
+
+# Patched for every test; the mocks are passed as (mock_session, mock_age, mock_expiration)
+@patch('aws_profiler.account_info.get_credential_expiration')
+@patch('aws_profiler.account_info.get_credential_age')
+@patch('aws_profiler.account_info.botocore.session.Session')
 class TestGetAccountInfo:
     """Tests for get_account_info() function."""
     
-    @patch('aws_profiler.account_info.get_credential_expiration')
-    @patch('aws_profiler.account_info.get_credential_age')
-    @patch('aws_profiler.account_info.boto3.Session')
-    def test_get_info_iam_user_success(self, mock_session, mock_age, mock_expiration):
+    def test_get_info_iam_user_success(self, mock_session, mock_age, mock_expiration, sts_session_mock):
         """Test A-01: Active IAM user."""
         # Setup mocks
-        mock_sts = Mock()
+        mock_session_instance, mock_sts = sts_session_mock
+        mock_session.return_value = mock_session_instance
         mock_sts.get_caller_identity.return_value = {
             'Account': '123456789012',
             'Arn': 'arn:aws:iam::123456789012:user/john-doe',
             'UserId': 'AIDAI123456789EXAMPLE'
         }
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_sts
-        mock_session.return_value = mock_session_instance
-        
         mock_age.return_value = '3d 5h'
         mock_expiration.return_value = {
             'expires_in': 'Permanent',
@@ -47,23 +69,17 @@ class TestGetAccountInfo:
         assert result['expires_in'] == 'Permanent'
         assert result['expiration_date'] == 'Never'
     
-    @patch('aws_profiler.account_info.get_credential_expiration')
-    @patch('aws_profiler.account_info.get_credential_age')
-    @patch('aws_profiler.account_info.boto3.Session')
-    def test_get_info_assumed_role(self, mock_session, mock_age, mock_expiration):
+    def test_get_info_assumed_role(self, mock_session, mock_age, mock_expiration, sts_session_mock):
         """Test A-02: Assumed role credentials."""
         # Setup mocks
-        mock_sts = Mock()
+        mock_session_instance, mock_sts = sts_session_mock
+        mock_session.return_value = mock_session_instance
         mock_sts.get_caller_identity.return_value = {
             'Account': '123456789012',
             'Arn': 'arn:aws:sts::123456789012:assumed-role/MyRole/session-name',
             'UserId': 'AROAI123456789EXAMPLE:session-name'
         }
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_sts
-        mock_session.return_value = mock_session_instance
-        
         mock_age.return_value = '2h'
         mock_expiration.return_value = {
             'expires_in': '10h 30m',
@@ -79,18 +95,14 @@ class TestGetAccountInfo:
         assert 'assumed-role' in result['arn']
         assert result['status'] == 'Active'
     
-    @patch('aws_profiler.account_info.boto3.Session')
-    def test_get_info_expired_token(self, mock_session):
+    def test_get_info_expired_token(self, mock_session, mock_age, mock_expiration, sts_session_mock):
         """Test A-03: Expired credentials."""
         # Setup mock to raise ExpiredToken error
-        mock_sts = Mock()
+        mock_session_instance, mock_sts = sts_session_mock
+        mock_session.return_value = mock_session_instance
         error_response = {'Error': {'Code': 'ExpiredToken', 'Message': 'Token expired'}}
         mock_sts.get_caller_identity.side_effect = ClientError(error_response, 'GetCallerIdentity')
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_sts
-        mock_session.return_value = mock_session_instance
-        
         # Execute
         result = get_account_info('expired-profile')
         
@@ -101,18 +113,14 @@ class TestGetAccountInfo:
         assert result['user_name'] == 'N/A'
         assert result['expires_in'] == 'Expired'
     
-    @patch('aws_profiler.account_info.boto3.Session')
-    def test_get_info_invalid_token(self, mock_session):
+    def test_get_info_invalid_token(self, mock_session, mock_age, mock_expiration, sts_session_mock):
         """Test A-04: Invalid credentials."""
         # Setup mock to raise InvalidClientTokenId error
-        mock_sts = Mock()
+        mock_session_instance, mock_sts = sts_session_mock
+        mock_session.return_value = mock_session_instance
         error_response = {'Error': {'Code': 'InvalidClientTokenId', 'Message': 'Invalid token'}}
         mock_sts.get_caller_identity.side_effect = ClientError(error_response, 'GetCallerIdentity')
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_sts
-        mock_session.return_value = mock_session_instance
-        
         # Execute
         result = get_account_info('invalid-profile')
         
@@ -120,8 +128,7 @@ class TestGetAccountInfo:
         assert result['status'] == 'Expired'
         assert result['account_id'] == 'N/A'
     
-    @patch('aws_profiler.account_info.boto3.Session')
-    def test_get_info_no_credentials(self, mock_session):
+    def test_get_info_no_credentials(self, mock_session, mock_age, mock_expiration):
         """Test A-05: Profile has no credentials."""
         # Setup mock to raise NoCredentialsError
         mock_session.side_effect = NoCredentialsError()
@@ -135,8 +142,7 @@ class TestGetAccountInfo:
         assert result['account_id'] == 'N/A'
         assert result['credential_age'] == 'N/A'
     
-    @patch('aws_profiler.account_info.boto3.Session')
-    def test_get_info_profile_not_found(self, mock_session):
+    def test_get_info_profile_not_found(self, mock_session, mock_age, mock_expiration):
         """Test A-06: Profile doesn't exist."""
         # Setup mock to raise ProfileNotFound error
         mock_session.side_effect = ProfileNotFound(profile='missing-profile')
@@ -148,18 +154,14 @@ class TestGetAccountInfo:
         assert result['status'] == 'No Credentials'
         assert result['account_id'] == 'N/A'
     
-    @patch('aws_profiler.account_info.boto3.Session')
-    def test_get_info_access_denied(self, mock_session):
+    def test_get_info_access_denied(self, mock_session, mock_age, mock_expiration, sts_session_mock):
         """Test A-07: Insufficient permissions."""
         # Setup mock to raise AccessDenied error
-        mock_sts = Mock()
+        mock_session_instance, mock_sts = sts_session_mock
+        mock_session.return_value = mock_session_instance
         error_response = {'Error': {'Code': 'AccessDenied', 'Message': 'Access denied'}}
         mock_sts.get_caller_identity.side_effect = ClientError(error_response, 'GetCallerIdentity')
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_sts
-        mock_session.return_value = mock_session_instance
-        
         # Execute
         result = get_account_info('denied-profile')
         
@@ -167,23 +169,17 @@ class TestGetAccountInfo:
         assert result['status'] == 'Error: AccessDenied'
         assert result['account_id'] == 'N/A'
     
-    @patch('aws_profiler.account_info.get_credential_expiration')
-    @patch('aws_profiler.account_info.get_credential_age')
-    @patch('aws_profiler.account_info.boto3.Session')
-    def test_get_info_with_credential_age(self, mock_session, mock_age, mock_expiration):
+    def test_get_info_with_credential_age(self, mock_session, mock_age, mock_expiration, sts_session_mock):
         """Test A-08: Verify age calculation."""
         # Setup mocks
-        mock_sts = Mock()
+        mock_session_instance, mock_sts = sts_session_mock
+        mock_session.return_value = mock_session_instance
         mock_sts.get_caller_identity.return_value = {
             'Account': '123456789012',
             'Arn': 'arn:aws:iam::123456789012:user/test',
             'UserId': 'AIDAI123456789EXAMPLE'
         }
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_sts
-        mock_session.return_value = mock_session_instance
-        
         mock_age.return_value = '5d 12h'
         mock_expiration.return_value = {
             'expires_in': 'Permanent',
@@ -198,23 +194,17 @@ class TestGetAccountInfo:
         assert result['credential_age'] == '5d 12h'
         mock_age.assert_called_once_with('test-profile')
     
-    @patch('aws_profiler.account_info.get_credential_expiration')
-    @patch('aws_profiler.account_info.get_credential_age')
-    @patch('aws_profiler.account_info.boto3.Session')
-    def test_get_info_with_expiration(self, mock_session, mock_age, mock_expiration):
+    def test_get_info_with_expiration(self, mock_session, mock_age, mock_expiration, sts_session_mock):
         """Test A-09: Verify expiration data."""
         # Setup mocks
-        mock_sts = Mock()
+        mock_session_instance, mock_sts = sts_session_mock
+        mock_session.return_value = mock_session_instance
         mock_sts.get_caller_identity.return_value = {
             'Account': '123456789012',
             'Arn': 'arn:aws:sts::123456789012:assumed-role/MyRole/session',
             'UserId': 'AROAI123456789EXAMPLE:session'
         }
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_sts
-        mock_session.return_value = mock_session_instance
-        
         mock_age.return_value = '1h'
         mock_expiration.return_value = {
             'expires_in': '11h 45m',
@@ -229,25 +219,19 @@ class TestGetAccountInfo:
         assert 'expiration_date' in result
         assert result['expires_in'] == '11h 45m'
         assert result['expiration_date'] == '2025-11-25 23:45:00 UTC'
-        mock_expiration.assert_called_once_with(mock_session_instance)
+        mock_expiration.assert_called_once_with(mock_session_instance, sts_client=mock_sts)
     
-    @patch('aws_profiler.account_info.get_credential_expiration')
-    @patch('aws_profiler.account_info.get_credential_age')
-    @patch('aws_profiler.account_info.boto3.Session')
-    def test_get_info_unknown_arn_format(self, mock_session, mock_age, mock_expiration):
+    def test_get_info_unknown_arn_format(self, mock_session, mock_age, mock_expiration, sts_session_mock):
         """Test A-10: ARN doesn't match user/role."""
         # Setup mocks with unusual ARN
-        mock_sts = Mock()
+        mock_session_instance, mock_sts = sts_session_mock
+        mock_session.return_value = mock_session_instance
         mock_sts.get_caller_identity.return_value = {
             'Account': '123456789012',
             'Arn': 'arn:aws:iam::123456789012:something-unusual',
             'UserId': 'AIDAI123456789EXAMPLE'
         }
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_sts
-        mock_session.return_value = mock_session_instance
-        
         mock_age.return_value = '1d'
         mock_expiration.return_value = {
             'expires_in': 'N/A',
@@ -261,8 +245,7 @@ class TestGetAccountInfo:
         assert result['credential_type'] == 'Unknown'
         assert result['user_name'] == 'N/A'
     
-    @patch('aws_profiler.account_info.boto3.Session')
-    def test_get_info_generic_exception(self, mock_session):
+    def test_get_info_generic_exception(self, mock_session, mock_age, mock_expiration):
         """Test A-11: Unexpected error."""
         # Setup mock to raise generic exception
         mock_session.side_effect = Exception('Something unexpected happened with details')
@@ -276,23 +259,17 @@ class TestGetAccountInfo:
         assert len(result['status']) <= 38  # "Error: " + 30 chars + potential truncation
         assert result['account_id'] == 'N/A'
     
-    @patch('aws_profiler.account_info.get_credential_expiration')
-    @patch('aws_profiler.account_info.get_credential_age')
-    @patch('aws_profiler.account_info.boto3.Session')
-    def test_get_info_arn_parsing(self, mock_session, mock_age, mock_expiration):
+    def test_get_info_arn_parsing(self, mock_session, mock_age, mock_expiration, sts_session_mock):
         """Test A-12: Extract user name from ARN."""
         # Setup mocks with complex ARN
-        mock_sts = Mock()
+        mock_session_instance, mock_sts = sts_session_mock
+        mock_session.return_value = mock_session_instance
         mock_sts.get_caller_identity.return_value = {
             'Account': '123456789012',
             'Arn': 'arn:aws:iam::123456789012:user/engineering/developers/john',
             'UserId': 'AIDAI123456789EXAMPLE'
         }
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_sts
-        mock_session.return_value = mock_session_instance
-        
         mock_age.return_value = '2d'
         mock_expiration.return_value = {
             'expires_in': 'Permanent',
@@ -305,3 +282,109 @@ class TestGetAccountInfo:
         # Verify - should extract last part after final /
         assert result['user_name'] == 'john'
         assert result['credential_type'] == 'User'
+    
+    def test_get_info_reuses_session(self, mock_session, mock_age, mock_expiration, sts_session_mock):
+        """Test A-13: Session and STS client are built once per profile."""
+        mock_session_instance, mock_sts = sts_session_mock
+        mock_session.return_value = mock_session_instance
+        mock_sts.get_caller_identity.return_value = {
+            'Account': '123456789012',
+            'Arn': 'arn:aws:iam::123456789012:user/john',
+            'UserId': 'AIDAI123456789EXAMPLE'
+        }
+        
+        mock_age.return_value = '1d'
+        mock_expiration.return_value = {
+            'expires_in': 'Permanent',
+            'expiration_date': 'Never'
+        }
+        
+        # Execute twice for the same profile
+        get_account_info('test-profile')
+        get_account_info('test-profile')
+        
+        # Verify
+        mock_session.assert_called_once_with(profile='test-profile')
+        mock_session_instance.create_client.assert_called_once()
+        assert mock_session_instance.create_client.call_args[0][0] == 'sts'
+        assert mock_sts.get_caller_identity.call_count == 2
+    
+    def test_get_info_timeout(self, mock_session, mock_age, mock_expiration, sts_session_mock):
+        """Test A-15: STS call times out."""
+        mock_session_instance, mock_sts = sts_session_mock
+        mock_session.return_value = mock_session_instance
+        mock_sts.get_caller_identity.side_effect = ReadTimeoutError(
+            endpoint_url='https://sts.us-east-1.amazonaws.com'
+        )
+        
+        # Execute
+        result = get_account_info('slow-profile')
+        
+        # Verify
+        assert result['status'] == 'Error: Timeout'
+        assert result['account_id'] == 'N/A'
+
+
+class TestGetAccountInfoBulk:
+    """Tests for get_account_info_bulk() function."""
+    
+    @patch('aws_profiler.account_info.get_account_info')
+    def test_bulk_preserves_order(self, mock_info):
+        """Test A-16: Results follow the input order and reach the callback."""
+        mock_info.side_effect = lambda profile: {'profile': profile, 'status': 'Active'}
+        seen = []
+        
+        results = get_account_info_bulk(['a', 'b', 'c'], on_result=lambda p, info: seen.append(p))
+        
+        assert [info['profile'] for info in results] == ['a', 'b', 'c']
+        assert sorted(seen) == ['a', 'b', 'c']
+    
+    def test_bulk_no_profiles(self):
+        """Test A-17: Nothing to check."""
+        assert get_account_info_bulk([]) == []
+    
+    @patch('aws_profiler.account_info.get_account_info')
+    def test_bulk_timeout_per_profile(self, mock_info):
+        """Test A-18: Only the hung check times out; later ones get their full timeout."""
+        release = threading.Event()
+        
+        def fake_info(profile):
+            if profile == 'hung':
+                release.wait()
+            else:
+                time.sleep(0.02)
+            return {'profile': profile, 'status': 'Active'}
+        
+        mock_info.side_effect = fake_info
+        profiles = ['hung'] + [f'p{i}' for i in range(40)]
+        
+        try:
+            results = get_account_info_bulk(profiles, timeout=0.3)
+        finally:
+            release.set()
+        
+        assert results[0]['status'] == 'Error: Timeout'
+        assert all(info['status'] == 'Active' for info in results[1:])
+    
+    @patch('aws_profiler.account_info.get_account_info')
+    def test_bulk_all_threads_hung(self, mock_info):
+        """Test A-19: Profiles queued behind hung checks are never started."""
+        release = threading.Event()
+        
+        def fake_info(profile):
+            release.wait()
+            return {'profile': profile, 'status': 'Active'}
+        
+        mock_info.side_effect = fake_info
+        profiles = [f'p{i}' for i in range(40)]
+        
+        try:
+            results = get_account_info_bulk(profiles, timeout=0.05)
+        finally:
+            release.set()
+        
+        # Freed threads don't go on to check the profiles already reported
+        time.sleep(0.05)
+        assert mock_info.call_count == 32
+        assert [info['profile'] for info in results] == profiles
+        assert all(info['status'] == 'Error: Timeout' for info in results)
@@ -0,0 +1,142 @@
+"""Unit tests for aws_profiler.async_checker module."""
+
+import asyncio
+import pytest
+from unittest.mock import Mock, patch
+from datetime import datetime, timezone, timedelta
+from botocore.config import Config
+from botocore.exceptions import ClientError, ProfileNotFound
+from freezegun import freeze_time
+
+from aws_profiler import async_checker
+from aws_profiler.async_checker import check_profiles_async
+
+
+class FakeStsClient:
+    """Async context manager standing in for an aiobotocore STS client."""
+    
+    def __init__(self, identity=None, error=None):
+        self.identity = identity
+        self.error = error
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        return False
+    
+    async def get_caller_identity(self):
+        if self.error:
+            raise self.error
+        return self.identity
+
+
+class FakeCredentials:
+    """Stand-in for aiobotocore credentials."""
+    
+    def __init__(self, token=None, expiry_time=None):
+        self.token = token
+        self._expiry_time = expiry_time
+    
+    async def get_frozen_credentials(self):
+        return Mock(token=self.token)
+
+
+def make_session_factory(clients, credentials=None):
+    """Build an AioSession replacement keyed by profile name."""
+    def factory(profile):
+        if isinstance(clients[profile], Exception):
+            raise clients[profile]
+        session = Mock()
+        session.get_config_variable.return_value = 'eu-west-1'
+        session.create_client.return_value = clients[profile]
+        
+        async def get_credentials():
+            return credentials or FakeCredentials()
+        
+        session.get_credentials = get_credentials
+        return session
+    return factory
+
+
+@pytest.fixture
+def fake_aiobotocore(monkeypatch):
+    """Pretend aiobotocore is installed; tests supply the session factory."""
+    monkeypatch.setattr(async_checker, 'AIOBOTOCORE_AVAILABLE', True)
+    monkeypatch.setattr(async_checker, 'AioConfig', Config)
+
+
+@patch('aws_profiler.async_checker.get_credential_age', return_value='1d')
+class TestCheckProfilesAsync:
+    """Tests for check_profiles_async() function."""
+    
+    def test_async_results_in_profile_order(self, mock_age, monkeypatch, fake_aiobotocore):
+        """Test Y-01: Results keep input order and map statuses."""
+        error_response = {'Error': {'Code': 'ExpiredToken', 'Message': 'Token expired'}}
+        clients = {
+            'user': FakeStsClient({'Account': '123456789012',
+                                   'Arn': 'arn:aws:iam::123456789012:user/john'}),
+            'expired': FakeStsClient(error=ClientError(error_response, 'GetCallerIdentity')),
+            'missing': ProfileNotFound(profile='missing'),
+        }
+        monkeypatch.setattr(async_checker, 'AioSession', make_session_factory(clients))
+        
+        results = check_profiles_async(['user', 'expired', 'missing'])
+        
+        assert [r['profile'] for r in results] == ['user', 'expired', 'missing']
+        assert results[0]['status'] == 'Active'
+        assert results[0]['user_name'] == 'john'
+        assert results[0]['expires_in'] == 'Permanent'
+        assert results[1]['status'] == 'Expired'
+        assert results[2]['status'] == 'No Credentials'
+    
+    @freeze_time("2025-11-24 12:00:00")
+    def test_async_temporary_expiration(self, mock_age, monkeypatch, fake_aiobotocore):
+        """Test Y-02: Expiry comes from the refreshable credentials."""
+        clients = {
+            'role': FakeStsClient({'Account': '123456789012',
+                                   'Arn': 'arn:aws:sts::123456789012:assumed-role/MyRole/s'}),
+        }
+        credentials = FakeCredentials(
+            token='temp-token',
+            expiry_time=datetime.now(timezone.utc) + timedelta(hours=1, minutes=5)
+        )
+        monkeypatch.setattr(async_checker, 'AioSession', make_session_factory(clients, credentials))
+        
+        results = check_profiles_async(['role'])
+        
+        assert results[0]['credential_type'] == 'Role'
+        assert results[0]['expires_in'] == '1h 5m'
+    
+    def test_async_on_result_callback(self, mock_age, monkeypatch, fake_aiobotocore):
+        """Test Y-03: Callback fires once per profile."""
+        clients = {
+            name: FakeStsClient({'Account': '1', 'Arn': f'arn:aws:iam::1:user/{name}'})
+            for name in ['a', 'b']
+        }
+        monkeypatch.setattr(async_checker, 'AioSession', make_session_factory(clients))
+        on_result = Mock()
+        
+        check_profiles_async(['a', 'b'], on_result=on_result)
+        
+        assert sorted(c[0][0] for c in on_result.call_args_list) == ['a', 'b']
+    
+    def test_async_timeout(self, mock_age, monkeypatch, fake_aiobotocore):
+        """Test Y-05: A hung profile is reported as timed out."""
+        async def hang(profile_name):
+            await asyncio.sleep(10)
+        
+        monkeypatch.setattr(async_checker, '_check_profile', hang)
+        monkeypatch.setattr(async_checker, 'PROFILE_CHECK_TIMEOUT', 0.01)
+        
+        results = check_profiles_async(['slow'])
+        
+        assert results[0]['profile'] == 'slow'
+        assert results[0]['status'] == 'Error: Timeout'
+    
+    def test_async_requires_aiobotocore(self, mock_age, monkeypatch):
+        """Test Y-04: Clear error when the extra isn't installed."""
+        monkeypatch.setattr(async_checker, 'AIOBOTOCORE_AVAILABLE', False)
+        
+        with pytest.raises(RuntimeError, match='aiobotocore'):
+            check_profiles_async(['a'])
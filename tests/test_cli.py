@@ -0,0 +1,194 @@
+"""Unit tests for aws_profiler.cli module."""
+
+import json
+import time
+import pytest
+from unittest.mock import patch
+
+from aws_profiler.cli import (
+    render_table, get_status_symbol, list_profiles, list_profiles_json, check_profiles, refresh_all_profiles
+)
+
+
+class TestRenderTable:
+    """Tests for render_table() function."""
+    
+    def test_render_table_layout(self):
+        """Test L-01: Grid borders, padding and row separators."""
+        table = render_table([['dev', '✓ Active'], ['production', '✗ Expired']],
+                             ['Profile', 'Status'])
+        
+        assert table.split('\n') == [
+            '╒════════════╤═══════════╕',
+            '│ Profile    │ Status    │',
+            '╞════════════╪═══════════╡',
+            '│ dev        │ ✓ Active  │',
+            '├────────────┼───────────┤',
+            '│ production │ ✗ Expired │',
+            '╘════════════╧═══════════╛',
+        ]
+    
+    def test_render_table_header_wider_than_cells(self):
+        """Test L-02: Header sets the width when cells are shorter."""
+        table = render_table([['1']], ['Account ID'])
+        
+        assert '│ 1          │' in table
+    
+    def test_render_table_no_rows(self):
+        """Test L-03: Headers only."""
+        table = render_table([], ['Profile', 'Age'])
+        
+        assert table.split('\n') == [
+            '╒═════════╤═════╕',
+            '│ Profile │ Age │',
+            '╞═════════╪═════╡',
+            '╘═════════╧═════╛',
+        ]
+
+
+class TestGetStatusSymbol:
+    """Tests for get_status_symbol() function."""
+    
+    @pytest.mark.parametrize('status,symbol', [
+        ('Active', '✓ Active'),
+        ('Expired', '✗ Expired'),
+        ('No Credentials', '⚠ No Creds'),
+        ('Error: AccessDenied', '✗ Invalid'),
+        ('Something else', '✗ Invalid'),
+    ])
+    def test_status_symbol(self, status, symbol):
+        """Test L-04: Status display mapping."""
+        assert get_status_symbol(status) == symbol
+
+
+@patch('aws_profiler.async_checker.AIOBOTOCORE_AVAILABLE', False)
+class TestListProfilesJson:
+    """Tests for list_profiles_json() function."""
+    
+    @patch('aws_profiler.account_info.get_account_info')
+    @patch('aws_profiler.profiles.get_aws_profiles')
+    def test_json_output(self, mock_profiles, mock_info, capsys, readonly_aws_dir):
+        """Test L-05: Results are written as a JSON array, in profile order."""
+        mock_profiles.return_value = ['dev', 'prod']
+        mock_info.side_effect = lambda profile: {'profile': profile, 'status': 'Active'}
+        
+        list_profiles_json()
+        
+        output = capsys.readouterr().out
+        assert json.loads(output) == [
+            {'profile': 'dev', 'status': 'Active'},
+            {'profile': 'prod', 'status': 'Active'},
+        ]
+        # No banner, progress or summary
+        assert 'Checking' not in output
+        assert 'Summary' not in output
+    
+    @patch('aws_profiler.profiles.get_aws_profiles')
+    def test_json_no_profiles(self, mock_profiles, capsys):
+        """Test L-06: No profiles gives an empty array."""
+        mock_profiles.return_value = []
+        
+        list_profiles_json()
+        
+        assert json.loads(capsys.readouterr().out) == []
+
+
+@patch('aws_profiler.async_checker.AIOBOTOCORE_AVAILABLE', False)
+class TestListProfiles:
+    """Tests for list_profiles() function."""
+    
+    @patch('aws_profiler.account_info.get_account_info')
+    def test_list_profiles_table(self, mock_info, capsys, monkeypatch, mock_credentials_file, mock_config_file):
+        """Test L-09: Every profile on disk is checked and shown in the table."""
+        monkeypatch.setenv('TERM', 'xterm')
+        mock_info.side_effect = lambda profile: {
+            'profile': profile,
+            'account_id': '123456789012',
+            'user_name': 'john',
+            'credential_type': 'User',
+            'status': 'Expired' if profile == 'prod' else 'Active',
+            'credential_age': '3 days',
+            'expires_in': 'N/A',
+        }
+        
+        list_profiles()
+        
+        output = capsys.readouterr().out
+        assert sorted(call.args[0] for call in mock_info.call_args_list) == ['default', 'dev', 'prod', 'sso-dev']
+        assert 'Found 4 profile(s)' in output
+        assert '│ sso-dev ' in output
+        assert '✗ Expired' in output
+        assert 'Summary: ✓ 3 active  |  ✗ 1 expired  |  ⚠ 0 error/no credentials' in output
+    
+    @patch('aws_profiler.account_info.get_account_info')
+    def test_list_profiles_none_found(self, mock_info, capsys, readonly_aws_dir):
+        """Test L-10: No profiles prints a message without checking anything."""
+        list_profiles()
+        
+        assert 'No AWS profiles found' in capsys.readouterr().out
+        mock_info.assert_not_called()
+
+
+class TestRefreshAllProfiles:
+    """Tests for refresh_all_profiles() function."""
+    
+    @patch('builtins.input', return_value='no')
+    @patch('aws_profiler.cli.check_profiles')
+    def test_refresh_all_classifies_profiles(self, mock_check, mock_input, capsys,
+                                             mock_credentials_file, mock_config_file):
+        """Test L-11: Active profiles are sorted into SSO, IAM user and role groups."""
+        types = {'default': 'User', 'dev': 'User', 'prod': 'Role', 'sso-dev': 'Role'}
+        mock_check.side_effect = lambda profiles: [
+            {'profile': profile, 'status': 'Expired' if profile == 'dev' else 'Active',
+             'credential_type': types[profile]}
+            for profile in profiles
+        ]
+        
+        assert refresh_all_profiles() == 1
+        
+        output = capsys.readouterr().out
+        mock_check.assert_called_once_with(['default', 'dev', 'prod', 'sso-dev'])
+        assert 'IAM Users (can refresh):    1' in output
+        assert 'SSO Profiles (can refresh): 1' in output
+        assert 'Roles (cannot refresh):     1' in output
+        assert 'Inactive/Error profiles:    1' in output
+        assert 'Operation cancelled' in output
+
+
+@patch('aws_profiler.async_checker.AIOBOTOCORE_AVAILABLE', False)
+class TestCheckProfiles:
+    """Tests for check_profiles() function."""
+    
+    @patch('aws_profiler.async_checker.PROFILE_CHECK_TIMEOUT', 0.1)
+    @patch('aws_profiler.account_info.get_account_info')
+    def test_check_profiles_timeout(self, mock_info, readonly_aws_dir):
+        """Test L-07: A hung profile doesn't stall the others."""
+        def fake_info(profile):
+            if profile == 'slow':
+                time.sleep(1)
+            return {'profile': profile, 'status': 'Active'}
+        
+        mock_info.side_effect = fake_info
+        
+        start = time.monotonic()
+        results = check_profiles(['fast', 'slow'])
+        
+        assert time.monotonic() - start < 0.9
+        assert results[0]['status'] == 'Active'
+        assert results[1]['profile'] == 'slow'
+        assert results[1]['status'] == 'Error: Timeout'
+        assert results[1]['status_display'] == '✗ Invalid'
+    
+    @patch('aws_profiler.account_info.precheck_expiry')
+    @patch('aws_profiler.account_info.get_account_info')
+    def test_check_profiles_precheck_skips_sts(self, mock_info, mock_precheck):
+        """Test L-08: Profiles expired on disk are never sent to STS."""
+        mock_precheck.side_effect = lambda profile: 'Expired' if profile == 'sso' else None
+        mock_info.side_effect = lambda profile: {'profile': profile, 'status': 'Active'}
+        
+        results = check_profiles(['sso', 'iam'])
+        
+        mock_info.assert_called_once_with('iam')
+        assert results[0]['status'] == 'Expired'
+        assert results[0]['expires_in'] == 'Expired'
+        assert results[1]['status'] == 'Active'
@@ -0,0 +1,82 @@
+"""Unit tests for aws_profiler._clients module."""
+
+import botocore.session
+import pytest
+from unittest.mock import Mock
+
+from aws_profiler._clients import STS_CLIENT_SETTINGS, sts_client, sts_config
+
+
+class TestStsClient:
+    """Tests for sts_client() function."""
+    
+    def test_sts_client_regional_endpoint(self):
+        """Test S-01: Client is created in the session region with regional STS enabled."""
+        mock_session = Mock()
+        mock_session.get_config_variable.return_value = 'eu-west-1'
+        
+        client = sts_client(mock_session)
+        
+        assert client is mock_session.create_client.return_value
+        mock_session.set_config_variable.assert_called_once_with('sts_regional_endpoints', 'regional')
+        mock_session.create_client.assert_called_once()
+        args, kwargs = mock_session.create_client.call_args
+        assert args == ('sts',)
+        assert kwargs['region_name'] == 'eu-west-1'
+        # botocore resolves the URL, so endpoint overrides still apply
+        assert 'endpoint_url' not in kwargs
+    
+    def test_sts_client_bounded_timeouts(self):
+        """Test S-04: Client uses short timeouts and no retries."""
+        mock_session = Mock()
+        mock_session.get_config_variable.return_value = 'eu-west-1'
+        
+        sts_client(mock_session)
+        
+        config = mock_session.create_client.call_args[1]['config']
+        assert config.connect_timeout == 2
+        assert config.read_timeout == 3
+        assert config.retries['total_max_attempts'] == 1
+    
+    def test_sts_client_default_region(self):
+        """Test S-02: No configured region falls back to us-east-1."""
+        mock_session = Mock()
+        mock_session.get_config_variable.return_value = None
+        
+        sts_client(mock_session)
+        
+        kwargs = mock_session.create_client.call_args[1]
+        assert kwargs['region_name'] == 'us-east-1'
+    
+    @pytest.mark.parametrize('region, endpoint', [
+        ('eu-west-1', 'https://sts.eu-west-1.amazonaws.com'),
+        ('cn-north-1', 'https://sts.cn-north-1.amazonaws.com.cn'),
+        ('us-gov-west-1', 'https://sts.us-gov-west-1.amazonaws.com'),
+    ])
+    def test_sts_client_resolved_endpoint(self, monkeypatch, region, endpoint):
+        """Test S-03: botocore resolves the regional endpoint in every partition."""
+        monkeypatch.delenv('AWS_ENDPOINT_URL', raising=False)
+        monkeypatch.delenv('AWS_ENDPOINT_URL_STS', raising=False)
+        monkeypatch.setenv('AWS_CONFIG_FILE', '/nonexistent')
+        session = botocore.session.Session()
+        session.set_config_variable('region', region)
+        
+        assert sts_client(session).meta.endpoint_url == endpoint
+    
+    def test_sts_client_endpoint_override(self, monkeypatch):
+        """Test S-05: AWS_ENDPOINT_URL_STS still wins over the regional endpoint."""
+        monkeypatch.setenv('AWS_ENDPOINT_URL_STS', 'http://localhost:4566')
+        monkeypatch.setenv('AWS_CONFIG_FILE', '/nonexistent')
+        
+        assert sts_client(botocore.session.Session()).meta.endpoint_url == 'http://localhost:4566'
+    
+    def test_sts_client_single_attempt(self, monkeypatch):
+        """Test S-06: Real clients make one attempt and leave the shared settings alone."""
+        monkeypatch.setenv('AWS_CONFIG_FILE', '/nonexistent')
+        
+        client = sts_client(botocore.session.Session())
+        sts_client(botocore.session.Session())
+        
+        assert client.meta.config.retries['total_max_attempts'] == 1
+        assert STS_CLIENT_SETTINGS['retries'] == {'total_max_attempts': 1, 'mode': 'standard'}
+        assert sts_config().retries == {'total_max_attempts': 1, 'mode': 'standard'}
@@ -75,7 +75,7 @@ class TestGetCredentialAge:
         
         assert result == '0m'
     
-    def test_age_no_file(self, mock_empty_aws_dir):
+    def test_age_no_file(self, readonly_aws_dir):
         """Test C-05: Credentials file doesn't exist."""
         result = get_credential_age('any-profile')
         
@@ -89,9 +89,7 @@ class TestGetCredentialAge:
     
     def test_age_exception(self, mock_aws_dir, mock_credentials_file):
         """Test C-07: File stat fails."""
-        # Mock configparser to raise exception during parsing
-        with patch('aws_profiler.credentials.configparser.ConfigParser') as mock_config:
-            mock_config.return_value.read.side_effect = Exception('Permission denied')
+        with patch('aws_profiler._fs.os.scandir', side_effect=PermissionError('Permission denied')):
             result = get_credential_age('default')
         
         assert result == 'N/A'
@@ -111,6 +109,35 @@ class TestGetCredentialAge:
         
         # Should correctly calculate with UTC
         assert result == '2d 3h'
+    
+    @freeze_time("2025-11-24 12:00:00")
+    def test_age_future_mtime(self, mock_aws_dir, mock_credentials_file):
+        """Test C-20: Modification time ahead of the clock reads as just created."""
+        # Set file modification time 2 hours in the future (clock skew)
+        age_ago = datetime.now(timezone.utc) + timedelta(hours=2)
+        timestamp = age_ago.timestamp()
+        
+        credentials_path = mock_aws_dir / 'credentials'
+        import os
+        os.utime(credentials_path, (timestamp, timestamp))
+        
+        result = get_credential_age('default')
+        
+        assert result == '0m'
+    
+    def test_age_follows_the_clock(self, mock_aws_dir, mock_credentials_file):
+        """Test C-18: A long-lived process sees the age grow, with one section scan."""
+        from aws_profiler import credentials
+        
+        mtime = mock_credentials_file.stat().st_mtime
+        # Half a minute of slack absorbs float rounding of the mtime
+        with freeze_time(datetime.fromtimestamp(mtime + 2 * 3600 + 30, timezone.utc)) as frozen:
+            assert get_credential_age('default') == '2h'
+            frozen.tick(timedelta(days=3))
+            assert get_credential_age('dev') == '3d 2h'
+        
+        # The section names are still scanned once for both profiles
+        assert credentials._credential_sections.cache_info().misses == 1
 
 
 class TestGetCredentialExpiration:
@@ -136,23 +163,16 @@ class TestGetCredentialExpiration:
         mock_session = Mock()
         mock_creds = Mock()
         mock_creds.token = 'temporary-token-abc123'
+        mock_creds._expiry_time = datetime.now(timezone.utc) + timedelta(hours=11, minutes=30)
         mock_session.get_credentials.return_value = mock_creds
         
-        # Mock STS client response
-        mock_sts = Mock()
-        expiration_time = datetime.now(timezone.utc) + timedelta(hours=11, minutes=30)
-        mock_sts.get_session_token.return_value = {
-            'Credentials': {
-                'Expiration': expiration_time
-            }
-        }
-        mock_session.client.return_value = mock_sts
-        
         result = get_credential_expiration(mock_session)
         
         assert result['expires_in'] == '11h 30m'
         assert '2025-11-24' in result['expiration_date']
         assert 'UTC' in result['expiration_date']
+        # Expiry is read locally, no STS round-trip
+        mock_session.create_client.assert_not_called()
     
     @freeze_time("2025-11-24 12:00:00")
     def test_expiration_hours_and_minutes(self):
@@ -161,57 +181,128 @@ class TestGetCredentialExpiration:
         mock_session = Mock()
         mock_creds = Mock()
         mock_creds.token = 'temp-token'
+        mock_creds._expiry_time = datetime.now(timezone.utc) + timedelta(hours=3, minutes=45)
+        mock_session.get_credentials.return_value = mock_creds
+        
+        result = get_credential_expiration(mock_session)
+        
+        assert result['expires_in'] == '3h 45m'
+    
+    @freeze_time("2025-11-24 12:00:00")
+    def test_expiration_only_minutes(self):
+        """Test C-12: 30m remaining."""
+        # Mock session with temporary credentials
+        mock_session = Mock()
+        mock_creds = Mock()
+        mock_creds.token = 'temp-token'
+        mock_creds._expiry_time = datetime.now(timezone.utc) + timedelta(minutes=30)
+        mock_session.get_credentials.return_value = mock_creds
+        
+        result = get_credential_expiration(mock_session)
+        
+        assert result['expires_in'] == '30m'
+    
+    def test_expiration_temporary_no_expiry(self):
+        """Test C-16: Temp credentials without a known expiry."""
+        mock_session = Mock()
+        mock_creds = Mock()
+        mock_creds.token = 'temp-token'
+        mock_creds._expiry_time = None
+        mock_session.get_credentials.return_value = mock_creds
+        
+        result = get_credential_expiration(mock_session)
+        
+        assert result['expires_in'] == 'Temporary'
+        assert result['expiration_date'] == 'N/A'
+        # STS fallback is opt-in
+        mock_session.create_client.assert_not_called()
+    
+    @freeze_time("2025-11-24 12:00:00")
+    def test_expiration_sts_fallback(self, monkeypatch):
+        """Test C-17: Opt-in STS lookup when expiry is unknown."""
+        monkeypatch.setenv('AWS_PROFILER_STS_EXPIRATION', '1')
+        mock_session = Mock()
+        mock_creds = Mock()
+        mock_creds.token = 'temp-token'
+        mock_creds._expiry_time = None
         mock_session.get_credentials.return_value = mock_creds
         
-        # Mock STS response with 3h 45m expiration
         mock_sts = Mock()
-        expiration_time = datetime.now(timezone.utc) + timedelta(hours=3, minutes=45)
+        expiration_time = datetime.now(timezone.utc) + timedelta(hours=2, minutes=15)
         mock_sts.get_session_token.return_value = {
             'Credentials': {
                 'Expiration': expiration_time
             }
         }
-        mock_session.client.return_value = mock_sts
+        mock_session.create_client.return_value = mock_sts
         
         result = get_credential_expiration(mock_session)
         
-        assert result['expires_in'] == '3h 45m'
+        assert result['expires_in'] == '2h 15m'
+        mock_sts.get_session_token.assert_called_once()
     
-    @freeze_time("2025-11-24 12:00:00")
-    def test_expiration_only_minutes(self):
-        """Test C-12: 30m remaining."""
-        # Mock session with temporary credentials
+    def test_expiration_sts_cached_per_token(self, monkeypatch):
+        """Test C-19: The STS answer is reused while the same token is valid."""
+        monkeypatch.setenv('AWS_PROFILER_STS_EXPIRATION', '1')
         mock_session = Mock()
         mock_creds = Mock()
         mock_creds.token = 'temp-token'
+        mock_creds._expiry_time = None
         mock_session.get_credentials.return_value = mock_creds
         
-        # Mock STS response with 30m expiration
         mock_sts = Mock()
-        expiration_time = datetime.now(timezone.utc) + timedelta(minutes=30)
         mock_sts.get_session_token.return_value = {
             'Credentials': {
-                'Expiration': expiration_time
+                'Expiration': datetime.now(timezone.utc) + timedelta(hours=2)
             }
         }
-        mock_session.client.return_value = mock_sts
+        mock_session.create_client.return_value = mock_sts
         
+        get_credential_expiration(mock_session)
+        get_credential_expiration(mock_session)
+        mock_creds.token = 'other-token'
         result = get_credential_expiration(mock_session)
         
-        assert result['expires_in'] == '30m'
+        assert result['expiration_date'] != 'N/A'
+        assert mock_sts.get_session_token.call_count == 2
     
-    def test_expiration_temporary_no_sts(self):
+    def test_expiration_sts_reuses_given_client(self, monkeypatch):
+        """Test C-21: A caller's STS client is used instead of building one."""
+        monkeypatch.setenv('AWS_PROFILER_STS_EXPIRATION', '1')
+        mock_session = Mock()
+        mock_creds = Mock()
+        mock_creds.token = 'temp-token'
+        mock_creds._expiry_time = None
+        mock_session.get_credentials.return_value = mock_creds
+        
+        mock_sts = Mock()
+        mock_sts.get_session_token.return_value = {
+            'Credentials': {
+                'Expiration': datetime.now(timezone.utc) + timedelta(hours=2)
+            }
+        }
+        
+        result = get_credential_expiration(mock_session, sts_client=mock_sts)
+        
+        assert result['expiration_date'] != 'N/A'
+        mock_sts.get_session_token.assert_called_once()
+        mock_session.create_client.assert_not_called()
+        mock_session.client.assert_not_called()
+    
+    def test_expiration_temporary_no_sts(self, monkeypatch):
         """Test C-13: Temp credentials, STS call fails."""
+        monkeypatch.setenv('AWS_PROFILER_STS_EXPIRATION', '1')
         # Mock session with temporary credentials
         mock_session = Mock()
         mock_creds = Mock()
         mock_creds.token = 'temp-token'
+        mock_creds._expiry_time = None
         mock_session.get_credentials.return_value = mock_creds
         
         # Mock STS to raise exception
         mock_sts = Mock()
         mock_sts.get_session_token.side_effect = Exception('STS unavailable')
-        mock_session.client.return_value = mock_sts
+        mock_session.create_client.return_value = mock_sts
         
         result = get_credential_expiration(mock_session)
         
@@ -237,18 +328,9 @@ class TestGetCredentialExpiration:
         mock_session = Mock()
         mock_creds = Mock()
         mock_creds.token = 'temp-token'
+        mock_creds._expiry_time = datetime(2025, 11, 25, 10, 45, 30, tzinfo=timezone.utc)
         mock_session.get_credentials.return_value = mock_creds
         
-        # Mock STS response
-        mock_sts = Mock()
-        expiration_time = datetime(2025, 11, 25, 10, 45, 30, tzinfo=timezone.utc)
-        mock_sts.get_session_token.return_value = {
-            'Credentials': {
-                'Expiration': expiration_time
-            }
-        }
-        mock_session.client.return_value = mock_sts
-        
         result = get_credential_expiration(mock_session)
         
         # Verify format: YYYY-MM-DD HH:MM:SS UTC
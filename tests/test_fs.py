@@ -0,0 +1,43 @@
+"""Unit tests for aws_profiler._fs module."""
+
+import os
+from unittest.mock import patch
+
+from aws_profiler import _fs
+from aws_profiler._fs import aws_file_key
+
+
+class TestAwsFileStat:
+    """Tests for aws_file_key() function."""
+    
+    def test_listing_reused_within_ttl(self, mock_aws_dir, mock_credentials_file, mock_config_file):
+        """Test F-01: Lookups share one listing of ~/.aws."""
+        with patch('aws_profiler._fs.os.scandir', side_effect=os.scandir) as mock_scandir:
+            credentials_key = aws_file_key('credentials')
+            config_key = aws_file_key('config')
+            assert aws_file_key('credentials') is credentials_key
+        
+        stat_result = mock_credentials_file.stat()
+        assert credentials_key == (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+        assert config_key[2] == mock_config_file.stat().st_size
+        mock_scandir.assert_called_once()
+    
+    def test_listing_refreshed_after_ttl_or_clear(self, mock_aws_dir, mock_credentials_file):
+        """Test F-02: Expired or cleared listings are scanned again."""
+        with patch('aws_profiler._fs.os.scandir', side_effect=os.scandir) as mock_scandir, \
+             patch.object(_fs.time, 'monotonic', side_effect=[0, 1, 1]):
+            aws_file_key('credentials')
+            aws_file_key('credentials')
+            _fs.clear_cache()
+            aws_file_key('credentials')
+        
+        assert mock_scandir.call_count == 3
+    
+    def test_missing_files(self, mock_no_aws_dir):
+        """Test F-03: Missing ~/.aws or file gives None."""
+        assert aws_file_key('credentials') is None
+        
+        (mock_no_aws_dir / '.aws').mkdir()
+        _fs.clear_cache()
+        
+        assert aws_file_key('credentials') is None
@@ -0,0 +1,48 @@
+"""Unit tests for aws_profiler._identity_cache module."""
+
+from unittest.mock import Mock, patch
+
+from aws_profiler import _identity_cache
+from aws_profiler._identity_cache import get_caller_identity_cached, invalidate
+
+
+IDENTITY = {'Account': '123456789012', 'Arn': 'arn:aws:iam::123456789012:user/john'}
+
+
+class TestGetCallerIdentityCached:
+    """Tests for get_caller_identity_cached() function."""
+    
+    def test_identity_reused_within_ttl(self):
+        """Test I-01: Second lookup is served from the cache."""
+        mock_sts = Mock()
+        mock_sts.get_caller_identity.return_value = IDENTITY
+        
+        assert get_caller_identity_cached(mock_sts, 'dev') == IDENTITY
+        assert get_caller_identity_cached(mock_sts, 'dev') == IDENTITY
+        
+        mock_sts.get_caller_identity.assert_called_once()
+    
+    def test_identity_refetched_after_ttl(self):
+        """Test I-02: Expired entries go back to STS."""
+        mock_sts = Mock()
+        mock_sts.get_caller_identity.return_value = IDENTITY
+        
+        with patch.object(_identity_cache.time, 'monotonic', side_effect=[0, 301, 301]):
+            get_caller_identity_cached(mock_sts, 'dev')
+            get_caller_identity_cached(mock_sts, 'dev')
+        
+        assert mock_sts.get_caller_identity.call_count == 2
+    
+    def test_identity_invalidate(self):
+        """Test I-03: Invalidation only drops the given profile."""
+        mock_sts = Mock()
+        mock_sts.get_caller_identity.return_value = IDENTITY
+        
+        get_caller_identity_cached(mock_sts, 'dev')
+        get_caller_identity_cached(mock_sts, 'prod')
+        invalidate('dev')
+        invalidate('missing')
+        get_caller_identity_cached(mock_sts, 'dev')
+        get_caller_identity_cached(mock_sts, 'prod')
+        
+        assert mock_sts.get_caller_identity.call_count == 3
@@ -0,0 +1,27 @@
+"""Unit tests for aws_profiler._paths module."""
+
+from pathlib import Path
+
+from aws_profiler._paths import aws_dir, credentials_path, config_path
+
+
+class TestPaths:
+    """Tests for aws_dir(), credentials_path() and config_path()."""
+    
+    def test_paths_follow_home(self, mock_aws_dir):
+        """Test H-01: Paths are resolved against the current home directory."""
+        assert aws_dir() == mock_aws_dir
+        assert credentials_path() == mock_aws_dir / 'credentials'
+        assert config_path() == mock_aws_dir / 'config'
+    
+    def test_paths_resolved_per_call(self, tmp_path, monkeypatch):
+        """Test H-02: A home directory changed after import is honored."""
+        monkeypatch.setattr(Path, 'home', lambda: tmp_path / 'other')
+        
+        assert credentials_path() == tmp_path / 'other' / '.aws' / 'credentials'
+    
+    def test_paths_built_once_per_home(self, mock_aws_dir):
+        """Test H-03: Repeated lookups reuse the derived Path objects."""
+        assert credentials_path() is credentials_path()
+        assert aws_dir() is aws_dir()
+        assert config_path() is config_path()
@@ -1,41 +1,158 @@
 """Unit tests for aws_profiler.refresh module."""
 
 import pytest
-import configparser
-from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock, call
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+from unittest.mock import Mock, patch, call
 from botocore.exceptions import ClientError
 
+import aws_profiler.refresh as _ref
+from aws_profiler._clients import REFRESH_CLIENT_CONFIG
 from aws_profiler.refresh import (
+    _patch_credentials_section,
     refresh_sso_profile,
     refresh_iam_user_credentials,
     refresh_credentials
 )
 
 
+def _ini_for(profile, key, secret):
+    """
+    Credentials file holding one profile's key pair.
+    
+    Formatted directly rather than built and serialized through configparser
+    in every test.
+    """
+    return f"[{profile}]\naws_access_key_id = {key}\naws_secret_access_key = {secret}\n"
+
+
+# Credentials files for the IAM refresh tests
+_CREDS_INI = _ini_for('test-profile', 'AKIAOLD', 'oldSecret')
+
+_OTHER_INI = _ini_for('other-profile', 'AKIAOTHER', 'otherSecret')
+
+# The AWS CLI command refresh_sso_profile runs, minus the profile name
+_SSO_LOGIN_CMD = ('aws', 'sso', 'login', '--profile')
+
+# AWS responses shared by the IAM refresh tests; the mocks only read them
+_ARN_USER = {'Arn': 'arn:aws:iam::123456789012:user/john'}
+
+_ARN_ROLE = {'Arn': 'arn:aws:sts::123456789012:assumed-role/MyRole/session'}
+
+_NEW_KEY = {
+    'AccessKey': {
+        'AccessKeyId': 'AKIANEW',
+        'SecretAccessKey': 'newSecret'
+    }
+}
+
+# create_access_key failures, built once; side_effect re-raises the instance
+_LIMIT_ERR = ClientError(
+    {'Error': {'Code': 'LimitExceeded', 'Message': 'Cannot exceed quota for AccessKeysPerUser: 2'}},
+    'CreateAccessKey'
+)
+
+_DENIED_ERR = ClientError(
+    {'Error': {'Code': 'AccessDenied', 'Message': 'Not authorized'}},
+    'CreateAccessKey'
+)
+
+
+@pytest.fixture(autouse=True)
+def _default_backup(monkeypatch):
+    """Let every refresh back up successfully; R-13 overrides this to fail."""
+    monkeypatch.setattr('aws_profiler.refresh.backup_credentials',
+                        lambda *args, **kwargs: {'success': True, 'backup_file': '/tmp/backup'})
+
+
+@pytest.fixture
+def aws_mocks():
+    """
+    STS and IAM client mocks for the patched boto3.Session.
+    
+    The caller is the IAM user john and create_access_key returns a new
+    key; tests override only the responses they care about.
+    """
+    sts = Mock()
+    sts.get_caller_identity.return_value = _ARN_USER
+    
+    iam = Mock()
+    iam.create_access_key.return_value = _NEW_KEY
+    return sts, iam
+
+
+@pytest.fixture(autouse=True)
+def _mock_boto_session(monkeypatch, aws_mocks):
+    """Serve the aws_mocks clients from every boto3.Session; R-22 overrides this."""
+    sts, iam = aws_mocks
+    # The session's calls are never asserted on, so it needn't be a Mock
+    session = SimpleNamespace(client=lambda service, **kwargs: sts if service == 'sts' else iam)
+    monkeypatch.setattr('aws_profiler.refresh.boto3.Session', lambda **kwargs: session)
+
+
+class _FakeProcess:
+    """A Popen stand-in whose wait() calls the given function."""
+    
+    def __init__(self, wait):
+        self.wait = wait
+        self.kill = Mock()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+
+@pytest.fixture
+def mock_popen(monkeypatch):
+    """Replace subprocess.Popen on the module refresh already imported."""
+    popen = Mock()
+    monkeypatch.setattr(_ref.subprocess, 'Popen', popen)
+    return popen
+
+
+class TestModuleImport:
+    """Tests for importing the refresh module."""
+    
+    def test_refresh_import_defers_boto3(self):
+        """Test R-31: Importing the module doesn't load boto3."""
+        code = "import sys, aws_profiler.refresh; print('boto3' in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        
+        assert result.stdout.strip() == 'False'
+
+
 class TestRefreshSsoProfile:
     """Tests for refresh_sso_profile() function."""
     
-    @patch('aws_profiler.refresh.subprocess.run')
-    def test_sso_refresh_success(self, mock_run):
-        """Test R-01: SSO login succeeds."""
-        mock_run.return_value = Mock(returncode=0)
+    @pytest.fixture(autouse=True)
+    def use_aws_cli(self, monkeypatch):
+        """Log in through `aws sso login` rather than the device flow."""
+        monkeypatch.setenv('AWS_PROFILER_SSO_LOGIN_CLI', '1')
+    
+    @pytest.mark.parametrize('profile', ['sso-dev', 'my-profile'])
+    def test_sso_refresh_success(self, mock_popen, profile):
+        """Test R-01: SSO login succeeds and runs `aws sso login --profile <name>`."""
+        mock_popen.return_value = _FakeProcess(lambda: 0)
         
-        result = refresh_sso_profile('sso-dev')
+        result = refresh_sso_profile(profile)
         
         assert result['success'] is True
         assert 'SSO login successful' in result['message']
-        assert 'sso-dev' in result['message']
+        assert profile in result['message']
         
         # Verify correct command was called
-        mock_run.assert_called_once()
-        call_args = mock_run.call_args[0][0]
-        assert call_args == ['aws', 'sso', 'login', '--profile', 'sso-dev']
+        mock_popen.assert_called_once()
+        assert tuple(mock_popen.call_args.args[0]) == (*_SSO_LOGIN_CMD, profile)
     
-    @patch('aws_profiler.refresh.subprocess.run')
-    def test_sso_refresh_failure(self, mock_run):
+    def test_sso_refresh_failure(self, mock_popen):
         """Test R-02: SSO login fails."""
-        mock_run.return_value = Mock(returncode=1)
+        mock_popen.return_value = _FakeProcess(lambda: 1)
         
         result = refresh_sso_profile('sso-dev')
         
@@ -43,10 +160,20 @@ class TestRefreshSsoProfile:
         assert 'failed' in result['message'].lower()
         assert 'exit code 1' in result['message']
     
-    @patch('aws_profiler.refresh.subprocess.run')
-    def test_sso_aws_cli_not_found(self, mock_run):
+    def test_sso_login_interrupted(self, mock_popen):
+        """Test R-34: Ctrl-C during the login kills the AWS CLI."""
+        def interrupt():
+            raise KeyboardInterrupt
+        process = mock_popen.return_value = _FakeProcess(interrupt)
+        
+        with pytest.raises(KeyboardInterrupt):
+            refresh_sso_profile('sso-dev')
+        
+        process.kill.assert_called_once_with()
+    
+    def test_sso_aws_cli_not_found(self, mock_popen):
         """Test R-03: AWS CLI not installed."""
-        mock_run.side_effect = FileNotFoundError()
+        mock_popen.side_effect = FileNotFoundError()
         
         result = refresh_sso_profile('sso-dev')
         
@@ -54,25 +181,9 @@ class TestRefreshSsoProfile:
         assert 'AWS CLI not found' in result['message']
         assert 'install' in result['message'].lower()
     
-    @patch('aws_profiler.refresh.subprocess.run')
-    def test_sso_correct_command(self, mock_run):
-        """Test R-04: Verify command args."""
-        mock_run.return_value = Mock(returncode=0)
-        
-        refresh_sso_profile('my-profile')
-        
-        # Capture and verify the command
-        call_args = mock_run.call_args[0][0]
-        assert call_args[0] == 'aws'
-        assert call_args[1] == 'sso'
-        assert call_args[2] == 'login'
-        assert call_args[3] == '--profile'
-        assert call_args[4] == 'my-profile'
-    
-    @patch('aws_profiler.refresh.subprocess.run')
-    def test_sso_generic_exception(self, mock_run):
+    def test_sso_generic_exception(self, mock_popen):
         """Test R-05: Unexpected error."""
-        mock_run.side_effect = Exception('Unexpected error occurred')
+        mock_popen.side_effect = Exception('Unexpected error occurred')
         
         result = refresh_sso_profile('sso-dev')
         
@@ -80,522 +191,279 @@ class TestRefreshSsoProfile:
         assert 'Error during SSO login' in result['message']
 
 
-class TestRefreshIamUserCredentials:
-    """Tests for refresh_iam_user_credentials() function."""
+class TestSsoDeviceLogin:
+    """Tests for the built-in SSO OIDC device flow."""
     
-    @patch('aws_profiler.refresh.backup_credentials')
-    @patch('aws_profiler.refresh.get_current_access_key_id')
-    @patch('aws_profiler.refresh.boto3.Session')
-    def test_iam_refresh_success(self, mock_session, mock_get_key, mock_backup):
-        """Test R-06: Full refresh flow."""
-        # Setup mocks
-        mock_sts = Mock()
-        mock_sts.get_caller_identity.return_value = {
-            'Arn': 'arn:aws:iam::123456789012:user/john-doe'
-        }
-        
-        mock_iam = Mock()
-        mock_iam.list_access_keys.return_value = {
-            'AccessKeyMetadata': [{'AccessKeyId': 'AKIAOLD'}]
-        }
-        mock_iam.create_access_key.return_value = {
-            'AccessKey': {
-                'AccessKeyId': 'AKIANEW123',
-                'SecretAccessKey': 'newSecretKey456'
-            }
-        }
-        
-        mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: mock_sts if service == 'sts' else mock_iam
-        mock_session.return_value = mock_session_instance
-        
-        mock_get_key.return_value = 'AKIAOLD'
-        mock_backup.return_value = {
-            'success': True,
-            'backup_file': '/tmp/.aws/backups/backup_file'
-        }
+    class AuthorizationPending(Exception):
+        pass
+    
+    class SlowDown(Exception):
+        pass
+    
+    @pytest.fixture
+    def mock_oidc(self):
+        oidc = Mock()
+        oidc.exceptions.AuthorizationPendingException = self.AuthorizationPending
+        oidc.exceptions.SlowDownException = self.SlowDown
+        oidc.register_client.return_value = {
+            'clientId': 'client-id',
+            'clientSecret': 'client-secret',
+            'clientSecretExpiresAt': 4102444800,
+        }
+        oidc.start_device_authorization.return_value = {
+            'deviceCode': 'device-code',
+            'userCode': 'ABCD-EFGH',
+            'verificationUri': 'https://device.sso.us-east-1.amazonaws.com/',
+            'verificationUriComplete': 'https://device.sso.us-east-1.amazonaws.com/?user_code=ABCD-EFGH',
+            'expiresIn': 600,
+            'interval': 1,
+        }
+        oidc.create_token.side_effect = [
+            self.AuthorizationPending(),
+            {'accessToken': 'token', 'expiresIn': 28800, 'refreshToken': 'refresh'},
+        ]
+        with patch('aws_profiler.refresh.boto3.client', new_callable=Mock, return_value=oidc) as mock_client, \
+                patch('aws_profiler.refresh.webbrowser.open', new_callable=Mock), \
+                patch('aws_profiler.refresh.time.sleep', new_callable=Mock):
+            yield oidc, mock_client
+    
+    def test_device_login_writes_token(self, mock_popen, mock_oidc, mock_aws_dir, mock_config_file):
+        """Test R-26: Device flow caches the token where botocore looks for it."""
+        oidc, mock_client = mock_oidc
         
-        # Create mock credentials file
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/tmp')
-            creds_path = Path('/tmp/.aws/credentials')
-            creds_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            config = configparser.ConfigParser()
-            config['test-profile'] = {
-                'aws_access_key_id': 'AKIAOLD',
-                'aws_secret_access_key': 'oldSecret'
-            }
-            with open(creds_path, 'w') as f:
-                config.write(f)
-            
-            result = refresh_iam_user_credentials('test-profile', delete_old=False)
+        result = refresh_sso_profile('sso-dev')
         
         assert result['success'] is True
-        assert 'refreshed successfully' in result['message']
-        assert 'AKIANEW123' in result['message']
-    
-    @patch('aws_profiler.refresh.backup_credentials')
-    @patch('aws_profiler.refresh.get_current_access_key_id')
-    @patch('aws_profiler.refresh.boto3.Session')
-    def test_iam_refresh_with_delete(self, mock_session, mock_get_key, mock_backup):
-        """Test R-07: Refresh + delete old key."""
-        # Setup mocks
-        mock_sts = Mock()
-        mock_sts.get_caller_identity.return_value = {
-            'Arn': 'arn:aws:iam::123456789012:user/john-doe'
-        }
-        
-        mock_iam = Mock()
-        mock_iam.list_access_keys.return_value = {
-            'AccessKeyMetadata': [{'AccessKeyId': 'AKIAOLD'}]
-        }
-        mock_iam.create_access_key.return_value = {
-            'AccessKey': {
-                'AccessKeyId': 'AKIANEW123',
-                'SecretAccessKey': 'newSecretKey456'
-            }
-        }
-        mock_iam.delete_access_key.return_value = {}
+        assert 'SSO login successful' in result['message']
+        mock_popen.assert_not_called()
+        mock_client.assert_called_once_with('sso-oidc', region_name='us-east-1')
+        assert oidc.create_token.call_count == 2
+        
+        start_url = 'https://example.awsapps.com/start'
+        cache_file = (mock_aws_dir / 'sso' / 'cache' /
+                      f"{hashlib.sha1(start_url.encode('utf-8')).hexdigest()}.json")
+        token = json.loads(cache_file.read_text())
+        assert token['accessToken'] == 'token'
+        assert token['startUrl'] == start_url
+        assert token['refreshToken'] == 'refresh'
+        assert token['registrationExpiresAt'] == '2100-01-01T00:00:00Z'
+        assert cache_file.stat().st_mode & 0o777 == 0o600
+    
+    def test_device_login_sso_session(self, mock_popen, mock_oidc, mock_aws_dir):
+        """Test R-27: sso-session profiles use the shared section and session cache key."""
+        oidc, mock_client = mock_oidc
+        (mock_aws_dir / 'config').write_text(
+            "[profile team]\nsso_session = corp\nsso_account_id = 123456789012\n\n"
+            "[sso-session corp]\nsso_start_url = https://corp.awsapps.com/start\n"
+            "sso_region = eu-west-1\nsso_registration_scopes = sso:account:access\n"
+        )
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: mock_sts if service == 'sts' else mock_iam
-        mock_session.return_value = mock_session_instance
+        result = refresh_sso_profile('team')
         
-        mock_get_key.return_value = 'AKIAOLD'
-        mock_backup.return_value = {
-            'success': True,
-            'backup_file': '/tmp/.aws/backups/backup_file'
-        }
+        assert result['success'] is True
+        mock_client.assert_called_once_with('sso-oidc', region_name='eu-west-1')
+        assert oidc.register_client.call_args[1]['scopes'] == ['sso:account:access']
+        cache_file = (mock_aws_dir / 'sso' / 'cache' /
+                      f"{hashlib.sha1(b'corp').hexdigest()}.json")
+        assert cache_file.exists()
+    
+    def test_device_login_unresolved_falls_back(self, mock_popen, mock_oidc, mock_aws_dir):
+        """Test R-28: Profiles without SSO settings go through the AWS CLI."""
+        oidc, mock_client = mock_oidc
+        mock_popen.return_value = _FakeProcess(lambda: 0)
         
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/tmp')
-            creds_path = Path('/tmp/.aws/credentials')
-            creds_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            config = configparser.ConfigParser()
-            config['test-profile'] = {
-                'aws_access_key_id': 'AKIAOLD',
-                'aws_secret_access_key': 'oldSecret'
-            }
-            with open(creds_path, 'w') as f:
-                config.write(f)
-            
-            result = refresh_iam_user_credentials('test-profile', delete_old=True)
+        result = refresh_sso_profile('missing')
         
         assert result['success'] is True
-        # Verify delete was called
-        mock_iam.delete_access_key.assert_called_once_with(
-            UserName='john-doe',
-            AccessKeyId='AKIAOLD'
-        )
-        assert 'Old key AKIAOLD deleted' in result['message']
-    
-    @patch('aws_profiler.refresh.backup_credentials')
-    @patch('aws_profiler.refresh.get_current_access_key_id')
-    @patch('aws_profiler.refresh.boto3.Session')
-    def test_iam_refresh_without_delete(self, mock_session, mock_get_key, mock_backup):
-        """Test R-08: Refresh only."""
-        # Setup mocks
-        mock_sts = Mock()
-        mock_sts.get_caller_identity.return_value = {
-            'Arn': 'arn:aws:iam::123456789012:user/alice'
-        }
-        
-        mock_iam = Mock()
-        mock_iam.list_access_keys.return_value = {
-            'AccessKeyMetadata': [{'AccessKeyId': 'AKIAOLD'}]
-        }
-        mock_iam.create_access_key.return_value = {
-            'AccessKey': {
-                'AccessKeyId': 'AKIANEW123',
-                'SecretAccessKey': 'newSecretKey456'
-            }
-        }
+        mock_client.assert_not_called()
+        mock_popen.assert_called_once()
+
+
+class TestRefreshIamUserCredentials:
+    """Tests for refresh_iam_user_credentials() function."""
+    
+    @pytest.mark.parametrize('delete_old, expect_delete_called, substr', [
+        (False, False, 'still active'),
+        (True, True, 'Old key AKIAOLD deleted'),
+    ])
+    def test_iam_refresh_flow(self, aws_mocks, creds_file, monkeypatch,
+                              delete_old, expect_delete_called, substr):
+        """Test R-06: Full refresh flow, deleting the old key only when asked."""
+        mock_sts, mock_iam = aws_mocks
+        mock_iam.delete_access_key.return_value = {}
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: mock_sts if service == 'sts' else mock_iam
-        mock_session.return_value = mock_session_instance
+        monkeypatch.setattr('aws_profiler.refresh.get_current_access_key_id', Mock(return_value='AKIAOLD'))
         
-        mock_get_key.return_value = 'AKIAOLD'
-        mock_backup.return_value = {
-            'success': True,
-            'backup_file': '/tmp/.aws/backups/backup_file'
-        }
+        creds_file.write_text(_CREDS_INI)
         
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/tmp')
-            creds_path = Path('/tmp/.aws/credentials')
-            creds_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            config = configparser.ConfigParser()
-            config['test-profile'] = {
-                'aws_access_key_id': 'AKIAOLD',
-                'aws_secret_access_key': 'oldSecret'
-            }
-            with open(creds_path, 'w') as f:
-                config.write(f)
-            
-            result = refresh_iam_user_credentials('test-profile', delete_old=False)
+        result = refresh_iam_user_credentials('test-profile', delete_old=delete_old)
         
         assert result['success'] is True
-        # Verify delete was NOT called
-        mock_iam.delete_access_key.assert_not_called()
-        assert 'still active' in result['message']
+        assert 'refreshed successfully' in result['message']
+        assert 'AKIANEW' in result['message']
+        assert substr in result['message']
+        assert mock_iam.delete_access_key.called is expect_delete_called
+        if expect_delete_called:
+            mock_iam.delete_access_key.assert_called_once_with(
+                UserName='john',
+                AccessKeyId='AKIAOLD'
+            )
     
-    @patch('aws_profiler.refresh.boto3.Session')
-    def test_iam_refresh_role_not_user(self, mock_session):
+    def test_iam_refresh_role_not_user(self, aws_mocks, creds_exists):
         """Test R-09: Try to refresh assumed role."""
-        mock_sts = Mock()
-        mock_sts.get_caller_identity.return_value = {
-            'Arn': 'arn:aws:sts::123456789012:assumed-role/MyRole/session'
-        }
+        mock_sts, mock_iam = aws_mocks
+        mock_sts.get_caller_identity.return_value = _ARN_ROLE
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_sts
-        mock_session.return_value = mock_session_instance
-        
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/tmp')
-            creds_path = Path('/tmp/.aws/credentials')
-            creds_path.parent.mkdir(parents=True, exist_ok=True)
-            creds_path.touch()
-            
-            result = refresh_iam_user_credentials('role-profile')
+        result = refresh_iam_user_credentials('role-profile')
         
         assert result['success'] is False
         assert 'not an IAM user' in result['message']
     
-    def test_iam_refresh_no_credentials_file(self):
+    def test_iam_refresh_no_credentials_file(self, mock_no_aws_dir):
         """Test R-10: File doesn't exist."""
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/nonexistent')
-            
-            result = refresh_iam_user_credentials('test-profile')
+        result = refresh_iam_user_credentials('test-profile')
         
         assert result['success'] is False
         assert 'Credentials file not found' in result['message']
     
-    @patch('aws_profiler.refresh.get_current_access_key_id')
-    @patch('aws_profiler.refresh.boto3.Session')
-    def test_iam_refresh_no_access_key_id(self, mock_session, mock_get_key):
+    def test_iam_refresh_no_access_key_id(self, creds_exists, monkeypatch):
         """Test R-11: Can't get current key."""
-        mock_sts = Mock()
-        mock_sts.get_caller_identity.return_value = {
-            'Arn': 'arn:aws:iam::123456789012:user/john'
-        }
-        
-        mock_session_instance = Mock()
-        mock_session_instance.client.return_value = mock_sts
-        mock_session.return_value = mock_session_instance
-        
-        mock_get_key.return_value = None
+        monkeypatch.setattr('aws_profiler.refresh.get_current_access_key_id', Mock(return_value=None))
         
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/tmp')
-            creds_path = Path('/tmp/.aws/credentials')
-            creds_path.parent.mkdir(parents=True, exist_ok=True)
-            creds_path.touch()
-            
-            result = refresh_iam_user_credentials('test-profile')
+        result = refresh_iam_user_credentials('test-profile')
         
         assert result['success'] is False
         assert 'Could not find access key ID' in result['message']
     
-    @patch('aws_profiler.refresh.get_current_access_key_id')
-    @patch('aws_profiler.refresh.boto3.Session')
-    def test_iam_refresh_max_keys(self, mock_session, mock_get_key):
+    def test_iam_refresh_max_keys(self, aws_mocks, creds_exists, monkeypatch):
         """Test R-12: User already has 2 keys."""
-        mock_sts = Mock()
-        mock_sts.get_caller_identity.return_value = {
-            'Arn': 'arn:aws:iam::123456789012:user/john'
-        }
+        mock_sts, mock_iam = aws_mocks
+        mock_iam.create_access_key.side_effect = _LIMIT_ERR
         
-        mock_iam = Mock()
-        mock_iam.list_access_keys.return_value = {
-            'AccessKeyMetadata': [
-                {'AccessKeyId': 'AKIAKEY1'},
-                {'AccessKeyId': 'AKIAKEY2'}
-            ]
-        }
-        
-        mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: mock_sts if service == 'sts' else mock_iam
-        mock_session.return_value = mock_session_instance
-        
-        mock_get_key.return_value = 'AKIAKEY1'
+        monkeypatch.setattr('aws_profiler.refresh.get_current_access_key_id', Mock(return_value='AKIAKEY1'))
+        mock_backup = Mock()
+        monkeypatch.setattr('aws_profiler.refresh.backup_credentials', mock_backup)
         
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/tmp')
-            creds_path = Path('/tmp/.aws/credentials')
-            creds_path.parent.mkdir(parents=True, exist_ok=True)
-            creds_path.touch()
-            
-            result = refresh_iam_user_credentials('test-profile')
+        result = refresh_iam_user_credentials('test-profile')
         
         assert result['success'] is False
         assert 'already has 2 access keys' in result['message']
+        mock_backup.assert_not_called()
     
-    @patch('aws_profiler.refresh.backup_credentials')
-    @patch('aws_profiler.refresh.get_current_access_key_id')
-    @patch('aws_profiler.refresh.boto3.Session')
-    def test_iam_refresh_backup_fails(self, mock_session, mock_get_key, mock_backup):
+    def test_iam_refresh_backup_fails(self, aws_mocks, creds_exists, monkeypatch):
         """Test R-13: Backup operation fails."""
-        mock_sts = Mock()
-        mock_sts.get_caller_identity.return_value = {
-            'Arn': 'arn:aws:iam::123456789012:user/john'
-        }
+        mock_sts, mock_iam = aws_mocks
+        monkeypatch.setattr('aws_profiler.refresh.get_current_access_key_id', Mock(return_value='AKIAOLD'))
+        monkeypatch.setattr('aws_profiler.refresh.backup_credentials',
+                            lambda *args, **kwargs: {'success': False, 'message': 'Backup failed'})
         
-        mock_iam = Mock()
-        mock_iam.list_access_keys.return_value = {
-            'AccessKeyMetadata': [{'AccessKeyId': 'AKIAOLD'}]
-        }
-        
-        mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: mock_sts if service == 'sts' else mock_iam
-        mock_session.return_value = mock_session_instance
-        
-        mock_get_key.return_value = 'AKIAOLD'
-        mock_backup.return_value = {
-            'success': False,
-            'message': 'Backup failed'
-        }
-        
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/tmp')
-            creds_path = Path('/tmp/.aws/credentials')
-            creds_path.parent.mkdir(parents=True, exist_ok=True)
-            creds_path.touch()
-            
-            result = refresh_iam_user_credentials('test-profile')
+        result = refresh_iam_user_credentials('test-profile')
         
         assert result['success'] is False
         assert result['message'] == 'Backup failed'
+        mock_iam.delete_access_key.assert_called_once_with(
+            UserName='john', AccessKeyId='AKIANEW')
     
-    @patch('aws_profiler.refresh.backup_credentials')
-    @patch('aws_profiler.refresh.get_current_access_key_id')
-    @patch('aws_profiler.refresh.boto3.Session')
-    def test_iam_refresh_create_key_fails(self, mock_session, mock_get_key, mock_backup):
+    def test_iam_refresh_create_key_fails(self, aws_mocks, creds_exists, monkeypatch):
         """Test R-14: IAM create_access_key fails."""
-        mock_sts = Mock()
-        mock_sts.get_caller_identity.return_value = {
-            'Arn': 'arn:aws:iam::123456789012:user/john'
-        }
+        mock_sts, mock_iam = aws_mocks
+        mock_iam.create_access_key.side_effect = _DENIED_ERR
         
-        mock_iam = Mock()
-        mock_iam.list_access_keys.return_value = {
-            'AccessKeyMetadata': [{'AccessKeyId': 'AKIAOLD'}]
-        }
-        error_response = {'Error': {'Code': 'LimitExceeded', 'Message': 'Limit exceeded'}}
-        mock_iam.create_access_key.side_effect = ClientError(error_response, 'CreateAccessKey')
+        monkeypatch.setattr('aws_profiler.refresh.get_current_access_key_id', Mock(return_value='AKIAOLD'))
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: mock_sts if service == 'sts' else mock_iam
-        mock_session.return_value = mock_session_instance
-        
-        mock_get_key.return_value = 'AKIAOLD'
-        mock_backup.return_value = {
-            'success': True,
-            'backup_file': '/tmp/backup'
-        }
-        
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/tmp')
-            creds_path = Path('/tmp/.aws/credentials')
-            creds_path.parent.mkdir(parents=True, exist_ok=True)
-            creds_path.touch()
-            
-            result = refresh_iam_user_credentials('test-profile')
+        result = refresh_iam_user_credentials('test-profile')
         
         assert result['success'] is False
         assert 'AWS Error' in result['message']
-        assert 'LimitExceeded' in result['message']
+        assert 'AccessDenied' in result['message']
     
-    @patch('aws_profiler.refresh.backup_credentials')
-    @patch('aws_profiler.refresh.get_current_access_key_id')
-    @patch('aws_profiler.refresh.boto3.Session')
-    def test_iam_refresh_update_file_fails(self, mock_session, mock_get_key, mock_backup):
+    def test_iam_refresh_update_file_fails(self, creds_file, monkeypatch):
         """Test R-15: Can't write credentials file."""
-        mock_sts = Mock()
-        mock_sts.get_caller_identity.return_value = {
-            'Arn': 'arn:aws:iam::123456789012:user/john'
-        }
+        monkeypatch.setattr('aws_profiler.refresh.get_current_access_key_id', Mock(return_value='AKIAOLD'))
         
-        mock_iam = Mock()
-        mock_iam.list_access_keys.return_value = {
-            'AccessKeyMetadata': [{'AccessKeyId': 'AKIAOLD'}]
-        }
-        mock_iam.create_access_key.return_value = {
-            'AccessKey': {
-                'AccessKeyId': 'AKIANEW',
-                'SecretAccessKey': 'newSecret'
-            }
-        }
-        
-        mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: mock_sts if service == 'sts' else mock_iam
-        mock_session.return_value = mock_session_instance
-        
-        mock_get_key.return_value = 'AKIAOLD'
-        mock_backup.return_value = {
-            'success': True,
-            'backup_file': '/tmp/backup'
-        }
-        
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/tmp')
-            creds_path = Path('/tmp/.aws/credentials')
-            creds_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Create empty credentials file
-            config = configparser.ConfigParser()
-            # Profile not in file
-            with open(creds_path, 'w') as f:
-                config.write(f)
-            
-            result = refresh_iam_user_credentials('test-profile')
+        # creds_file is empty, so the profile is not in it
+        result = refresh_iam_user_credentials('test-profile')
         
         assert result['success'] is False
         assert 'not found in credentials file' in result['message']
     
-    @patch('aws_profiler.refresh.backup_credentials')
-    @patch('aws_profiler.refresh.get_current_access_key_id')
-    @patch('aws_profiler.refresh.boto3.Session')
-    def test_iam_refresh_delete_fails(self, mock_session, mock_get_key, mock_backup):
+    def test_iam_refresh_delete_fails(self, aws_mocks, creds_file, monkeypatch):
         """Test R-16: Delete old key fails."""
-        mock_sts = Mock()
-        mock_sts.get_caller_identity.return_value = {
-            'Arn': 'arn:aws:iam::123456789012:user/john'
-        }
-        
-        mock_iam = Mock()
-        mock_iam.list_access_keys.return_value = {
-            'AccessKeyMetadata': [{'AccessKeyId': 'AKIAOLD'}]
-        }
-        mock_iam.create_access_key.return_value = {
-            'AccessKey': {
-                'AccessKeyId': 'AKIANEW',
-                'SecretAccessKey': 'newSecret'
-            }
-        }
+        mock_sts, mock_iam = aws_mocks
         mock_iam.delete_access_key.side_effect = Exception('Delete failed')
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: mock_sts if service == 'sts' else mock_iam
-        mock_session.return_value = mock_session_instance
+        monkeypatch.setattr('aws_profiler.refresh.get_current_access_key_id', Mock(return_value='AKIAOLD'))
         
-        mock_get_key.return_value = 'AKIAOLD'
-        mock_backup.return_value = {
-            'success': True,
-            'backup_file': '/tmp/backup'
-        }
+        creds_file.write_text(_CREDS_INI)
         
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/tmp')
-            creds_path = Path('/tmp/.aws/credentials')
-            creds_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            config = configparser.ConfigParser()
-            config['test-profile'] = {
-                'aws_access_key_id': 'AKIAOLD',
-                'aws_secret_access_key': 'oldSecret'
-            }
-            with open(creds_path, 'w') as f:
-                config.write(f)
-            
-            result = refresh_iam_user_credentials('test-profile', delete_old=True)
+        result = refresh_iam_user_credentials('test-profile', delete_old=True)
         
         assert result['success'] is True
         assert 'Warning' in result['message']
         assert 'Could not delete old key' in result['message']
     
-    @patch('aws_profiler.refresh.get_current_access_key_id')
-    @patch('aws_profiler.refresh.boto3.Session')
-    def test_iam_refresh_username_extraction(self, mock_session, mock_get_key):
+    def test_iam_refresh_username_extraction(self, aws_mocks, creds_exists, monkeypatch):
         """Test R-17: Extract username from ARN."""
-        mock_sts = Mock()
+        mock_sts, mock_iam = aws_mocks
         mock_sts.get_caller_identity.return_value = {
             'Arn': 'arn:aws:iam::123456789012:user/engineering/alice'
         }
         
-        mock_iam = Mock()
-        mock_iam.list_access_keys.return_value = {
-            'AccessKeyMetadata': [{'AccessKeyId': 'AKIAOLD'}]
-        }
+        monkeypatch.setattr('aws_profiler.refresh.get_current_access_key_id', Mock(return_value='AKIAOLD'))
         
-        mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: mock_sts if service == 'sts' else mock_iam
-        mock_session.return_value = mock_session_instance
-        
-        mock_get_key.return_value = 'AKIAOLD'
-        
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/tmp')
-            creds_path = Path('/tmp/.aws/credentials')
-            creds_path.parent.mkdir(parents=True, exist_ok=True)
-            creds_path.touch()
-            
-            refresh_iam_user_credentials('test-profile')
-            
-            # Verify username extraction
-            mock_iam.list_access_keys.assert_called_once_with(UserName='alice')
-    
-    @patch('aws_profiler.refresh.backup_credentials')
-    @patch('aws_profiler.refresh.get_current_access_key_id')
-    @patch('aws_profiler.refresh.boto3.Session')
-    def test_iam_refresh_profile_not_in_file(self, mock_session, mock_get_key, mock_backup):
-        """Test R-18: Profile missing after creation."""
-        mock_sts = Mock()
-        mock_sts.get_caller_identity.return_value = {
-            'Arn': 'arn:aws:iam::123456789012:user/john'
-        }
+        refresh_iam_user_credentials('test-profile')
         
-        mock_iam = Mock()
-        mock_iam.list_access_keys.return_value = {
-            'AccessKeyMetadata': [{'AccessKeyId': 'AKIAOLD'}]
-        }
-        mock_iam.create_access_key.return_value = {
-            'AccessKey': {
-                'AccessKeyId': 'AKIANEW',
-                'SecretAccessKey': 'newSecret'
-            }
-        }
-        
-        mock_session_instance = Mock()
-        mock_session_instance.client.side_effect = lambda service: mock_sts if service == 'sts' else mock_iam
-        mock_session.return_value = mock_session_instance
+        # Verify username extraction
+        mock_iam.create_access_key.assert_called_once_with(UserName='alice')
+    
+    def test_iam_refresh_profile_not_in_file(self, creds_file, monkeypatch):
+        """Test R-18: Profile missing after creation."""
+        monkeypatch.setattr('aws_profiler.refresh.get_current_access_key_id', Mock(return_value='AKIAOLD'))
         
-        mock_get_key.return_value = 'AKIAOLD'
-        mock_backup.return_value = {
-            'success': True,
-            'backup_file': '/tmp/backup'
-        }
+        # Credentials file without the target profile
+        creds_file.write_text(_OTHER_INI)
         
-        with patch('aws_profiler.refresh.Path.home') as mock_home:
-            mock_home.return_value = Path('/tmp')
-            creds_path = Path('/tmp/.aws/credentials')
-            creds_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Create credentials file without the target profile
-            config = configparser.ConfigParser()
-            config['other-profile'] = {
-                'aws_access_key_id': 'AKIAOTHER',
-                'aws_secret_access_key': 'otherSecret'
-            }
-            with open(creds_path, 'w') as f:
-                config.write(f)
-            
-            result = refresh_iam_user_credentials('test-profile')
+        result = refresh_iam_user_credentials('test-profile')
         
         assert result['success'] is False
         assert 'not found in credentials file' in result['message']
+    
+    @pytest.mark.parametrize('arn', [
+        'arn:aws:iam::123456789012:root',
+        'arn:aws:sts::123456789012:federated-user/bob',
+        'arn:aws:iam::123456789012:role/service-role/MyRole',
+    ])
+    def test_iam_refresh_rejects_non_user_arns(self, arn, aws_mocks, creds_exists):
+        """Test R-29: Only IAM user ARNs are refreshable."""
+        mock_sts, mock_iam = aws_mocks
+        mock_sts.get_caller_identity.return_value = {'Arn': arn}
+        
+        result = refresh_iam_user_credentials('other-profile')
+        
+        assert result['success'] is False
+        assert 'not an IAM user' in result['message']
+    
+    def test_iam_refresh_reuses_session(self, aws_mocks, creds_exists, monkeypatch):
+        """Test R-22: Repeated refreshes share one session, client and identity."""
+        mock_sts, mock_iam = aws_mocks
+        mock_sts.get_caller_identity.return_value = _ARN_ROLE
+        mock_session = Mock()
+        mock_session.return_value.client.return_value = mock_sts
+        monkeypatch.setattr('aws_profiler.refresh.boto3.Session', mock_session)
+        
+        refresh_iam_user_credentials('role-profile')
+        refresh_iam_user_credentials('role-profile')
+        
+        mock_session.assert_called_once_with(profile_name='role-profile')
+        mock_session.return_value.client.assert_called_once_with('sts', config=REFRESH_CLIENT_CONFIG)
+        mock_sts.get_caller_identity.assert_called_once()
 
 
 class TestRefreshCredentials:
     """Tests for refresh_credentials() function."""
     
-    @patch('aws_profiler.refresh.refresh_sso_profile')
-    @patch('aws_profiler.refresh.is_sso_profile')
+    @patch('aws_profiler.refresh.refresh_sso_profile', new_callable=Mock)
+    @patch('aws_profiler.refresh.is_sso_profile', new_callable=Mock)
     def test_refresh_detects_sso(self, mock_is_sso, mock_refresh_sso):
         """Test R-19: Auto-detect SSO profile."""
         mock_is_sso.return_value = True
@@ -607,8 +475,8 @@ class TestRefreshCredentials:
         mock_refresh_sso.assert_called_once_with('sso-profile')
         assert result['success'] is True
     
-    @patch('aws_profiler.refresh.refresh_iam_user_credentials')
-    @patch('aws_profiler.refresh.is_sso_profile')
+    @patch('aws_profiler.refresh.refresh_iam_user_credentials', new_callable=Mock)
+    @patch('aws_profiler.refresh.is_sso_profile', new_callable=Mock)
     def test_refresh_detects_iam(self, mock_is_sso, mock_refresh_iam):
         """Test R-20: Auto-detect IAM user."""
         mock_is_sso.return_value = False
@@ -620,8 +488,8 @@ class TestRefreshCredentials:
         mock_refresh_iam.assert_called_once_with('iam-profile', False)
         assert result['success'] is True
     
-    @patch('aws_profiler.refresh.refresh_iam_user_credentials')
-    @patch('aws_profiler.refresh.is_sso_profile')
+    @patch('aws_profiler.refresh.refresh_iam_user_credentials', new_callable=Mock)
+    @patch('aws_profiler.refresh.is_sso_profile', new_callable=Mock)
     def test_refresh_passes_delete_flag(self, mock_is_sso, mock_refresh_iam):
         """Test R-21: Delete flag passed through."""
         mock_is_sso.return_value = False
@@ -631,3 +499,97 @@ class TestRefreshCredentials:
         
         mock_refresh_iam.assert_called_once_with('iam-profile', True)
         assert result['success'] is True
+
+
+class TestPatchCredentialsSection:
+    """Tests for _patch_credentials_section() function."""
+    
+    CREDENTIALS = (
+        "# work accounts\n"
+        "[default]\n"
+        "aws_access_key_id = AKIADEFAULT\n"
+        "aws_secret_access_key = defaultSecret\n"
+        "\n"
+        "[dev]\n"
+        "aws_access_key_id=AKIAOLD\n"
+        "; rotated quarterly\n"
+        "aws_secret_access_key=oldSecret\n"
+        "region = eu-west-1\n"
+    )
+    
+    def test_patch_replaces_only_target_lines(self, tmp_path):
+        """Test R-23: Other sections, comments and keys are left untouched."""
+        path = tmp_path / 'credentials'
+        path.write_text(self.CREDENTIALS)
+        
+        assert _patch_credentials_section(path, 'dev', {
+            'aws_access_key_id': 'AKIANEW',
+            'aws_secret_access_key': 'newSecret',
+        }) is True
+        
+        assert path.read_text() == self.CREDENTIALS.replace(
+            'aws_access_key_id=AKIAOLD', 'aws_access_key_id = AKIANEW'
+        ).replace('aws_secret_access_key=oldSecret', 'aws_secret_access_key = newSecret')
+        assert [p.name for p in tmp_path.iterdir()] == ['credentials']
+    
+    def test_patch_appends_missing_keys(self, tmp_path):
+        """Test R-24: Keys absent from the section are added to it."""
+        path = tmp_path / 'credentials'
+        path.write_text("[dev]\nregion = eu-west-1\n\n[prod]\nregion = us-east-1")
+        
+        _patch_credentials_section(path, 'dev', {'aws_access_key_id': 'AKIANEW'})
+        _patch_credentials_section(path, 'prod', {'aws_access_key_id': 'AKIAPROD'})
+        
+        assert path.read_text() == (
+            "[dev]\nregion = eu-west-1\naws_access_key_id = AKIANEW\n\n"
+            "[prod]\nregion = us-east-1\naws_access_key_id = AKIAPROD\n"
+        )
+    
+    def test_patch_writes_private_file(self, tmp_path):
+        """Test R-30: Rewritten file is owner-only and fully synced."""
+        path = tmp_path / 'credentials'
+        path.write_text(self.CREDENTIALS)
+        path.chmod(0o644)
+        
+        with patch('aws_profiler.refresh.os.fsync', new_callable=Mock, wraps=os.fsync) as mock_fsync:
+            _patch_credentials_section(path, 'default', {'aws_access_key_id': 'AKIANEW'})
+        
+        mock_fsync.assert_called_once()
+        assert path.stat().st_mode & 0o777 == 0o600
+    
+    def test_patch_through_symlink(self, tmp_path):
+        """Test R-32: A symlinked file is updated in place and stays a link."""
+        target = tmp_path / 'dotfiles' / 'credentials'
+        target.parent.mkdir()
+        target.write_text(self.CREDENTIALS)
+        link = tmp_path / 'credentials'
+        link.symlink_to(target)
+        
+        _patch_credentials_section(link, 'dev', {'aws_access_key_id': 'AKIANEW'})
+        
+        assert link.is_symlink()
+        assert 'aws_access_key_id = AKIANEW' in target.read_text()
+        assert [p.name for p in target.parent.iterdir()] == ['credentials']
+    
+    def test_patch_keeps_crlf(self, tmp_path):
+        """Test R-33: CRLF line endings survive the rewrite, including added keys."""
+        path = tmp_path / 'credentials'
+        path.write_bytes(b"[dev]\r\naws_access_key_id=AKIAOLD\r\n\r\n[prod]\r\nregion = us-east-1\r\n")
+        
+        _patch_credentials_section(path, 'dev', {
+            'aws_access_key_id': 'AKIANEW',
+            'aws_secret_access_key': 'newSecret',
+        })
+        
+        assert path.read_bytes() == (
+            b"[dev]\r\naws_access_key_id = AKIANEW\r\naws_secret_access_key = newSecret\r\n\r\n"
+            b"[prod]\r\nregion = us-east-1\r\n"
+        )
+    
+    def test_patch_missing_section(self, tmp_path):
+        """Test R-25: Unknown profile leaves the file unchanged."""
+        path = tmp_path / 'credentials'
+        path.write_text(self.CREDENTIALS)
+        
+        assert _patch_credentials_section(path, 'de', {'aws_access_key_id': 'AKIANEW'}) is False
+        assert path.read_text() == self.CREDENTIALS
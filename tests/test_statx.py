@@ -0,0 +1,37 @@
+"""Unit tests for aws_profiler._statx module."""
+
+import pytest
+from unittest.mock import patch
+
+from aws_profiler import _statx
+from aws_profiler._statx import stat_key
+
+
+class TestStatKey:
+    """Tests for stat_key() function."""
+    
+    def test_stat_key_matches_stat(self, mock_aws_dir, mock_credentials_file):
+        """Test X-01: Inode, modification time and size match os.stat()."""
+        stat_result = mock_credentials_file.stat()
+        
+        assert stat_key(mock_credentials_file) == (
+            stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size
+        )
+    
+    def test_stat_key_without_statx(self, mock_aws_dir, mock_credentials_file):
+        """Test X-02: Falls back to os.stat() where statx isn't available."""
+        stat_result = mock_credentials_file.stat()
+        
+        with patch('aws_profiler._statx._libc_statx', return_value=None):
+            result = stat_key(mock_credentials_file)
+        
+        assert result == (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+    
+    @pytest.mark.parametrize('statx_available', [True, False])
+    def test_stat_key_missing_file(self, mock_aws_dir, statx_available):
+        """Test X-03: Missing file raises FileNotFoundError."""
+        statx = _statx._libc_statx() if statx_available else None
+        
+        with patch('aws_profiler._statx._libc_statx', return_value=statx):
+            with pytest.raises(FileNotFoundError):
+                stat_key(mock_aws_dir / 'missing')